@@ -0,0 +1,165 @@
+"""
+history_store.py
+─────────────────────────────────────────────────────────────────────────────
+Columnar history of every daily snapshot, one Parquet file per month.
+
+data/history/VLS_history_YYYY-MM.parquet holds a finished month's snapshot
+rows with a Date column (YYYY-MM-DD) in front, typed like the daily
+snapshot (numeric prices/sizes/coordinates, dictionary-encoded
+categoricals) and zstd-compressed.
+
+The month still in progress is kept as one VLS_history_YYYY-MM-DD.parquet
+per day, so each daily run adds one small file instead of rewriting the
+month file in git. The first run of a new month merges the previous
+month's day files into its month file. Re-running a day replaces its rows
+wherever they are stored.
+
+load_history() reads any date range with column projection, touching only
+the files that overlap the range; which files exist is known from the
+snapshot manifest, never from a directory scan.
+
+When data/history/ does not exist yet it is backfilled once from the
+snapshots in the snapshot manifest.
+
+Run directly (python history_store.py) to rebuild it from scratch.
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import os
+import shutil
+from itertools import groupby
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from snapshot_store import (
+    CATEGORICAL_COLUMNS, LISTING_COLUMNS, apply_listing_types, load_snapshot_manifest,
+)
+
+HISTORY_DIR_NAME = 'history'
+HISTORY_COLUMNS = ['Date'] + LISTING_COLUMNS
+
+
+def _history_dir(folder):
+    return os.path.join(folder, HISTORY_DIR_NAME)
+
+
+def _month_path(folder, month):
+    return os.path.join(_history_dir(folder), f'VLS_history_{month}.parquet')
+
+
+def _day_path(folder, date_str):
+    return os.path.join(_history_dir(folder), f'VLS_history_{date_str}.parquet')
+
+
+def _by_month(dates):
+    """[(YYYY-MM, [dates])] for sorted YYYY-MM-DD dates."""
+    return [(month, list(days)) for month, days in groupby(dates, key=lambda d: d[:7])]
+
+
+def _write_rows(path, df):
+    df = apply_listing_types(df.sort_values('Date', kind='stable', ignore_index=True))
+    df['Date'] = df['Date'].astype('string')
+    tmp_path = path + '.tmp'
+    df[HISTORY_COLUMNS].to_parquet(tmp_path, engine='pyarrow', compression='zstd', index=False)
+    os.replace(tmp_path, path)
+
+
+def _concat(frames):
+    # Frames carry their own category sets; concatenate as objects and re-type on write.
+    return pd.concat([f.astype(object) for f in frames], ignore_index=True)
+
+
+def _compact_month(folder, month, dates):
+    """Merge a finished month's day files into its month file."""
+    day_paths = [_day_path(folder, d) for d in dates if os.path.exists(_day_path(folder, d))]
+    if not day_paths:
+        return
+    _write_rows(_month_path(folder, month), _concat([pd.read_parquet(p, engine='pyarrow') for p in day_paths]))
+    for path in day_paths:
+        os.remove(path)
+    print(f"[🗃️] History for {month} merged into VLS_history_{month}.parquet ({len(day_paths)} day(s))")
+
+
+def append_history(folder, date_str, df):
+    """Store one day's snapshot rows, replacing any rows already stored for that date.
+
+    The day goes into its own file unless its month has already been merged,
+    in which case the month file is rewritten. Finished months that still
+    have day files are merged afterwards.
+    """
+    if not os.path.isdir(_history_dir(folder)):
+        backfill_history(folder)
+    day = df[LISTING_COLUMNS].assign(Date=date_str)
+    month_path = _month_path(folder, date_str[:7])
+    if os.path.exists(month_path):
+        month = pd.read_parquet(month_path, engine='pyarrow')
+        _write_rows(month_path, _concat([month[month['Date'] != date_str], day]))
+    else:
+        _write_rows(_day_path(folder, date_str), day)
+
+    months = _by_month(sorted(set(load_snapshot_manifest(folder).dates) | {date_str}))
+    open_month = max(month for month, _ in months)
+    for month, dates in months:
+        if month < open_month and not os.path.exists(_month_path(folder, month)):
+            _compact_month(folder, month, dates)
+
+
+def backfill_history(folder):
+    """Rebuild data/history/ from every snapshot in the snapshot manifest."""
+    history_dir = _history_dir(folder)
+    tmp_dir = history_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    snapshots = load_snapshot_manifest(folder)
+    months = _by_month(snapshots.dates)
+    for i, (month, dates) in enumerate(months):
+        frames = [snapshots.read_text(d).replace('', pd.NA).assign(Date=d) for d in dates]
+        if i < len(months) - 1:
+            _write_rows(os.path.join(tmp_dir, os.path.basename(_month_path(folder, month))), _concat(frames))
+        else:
+            for d, frame in zip(dates, frames):
+                _write_rows(os.path.join(tmp_dir, os.path.basename(_day_path(folder, d))), frame)
+
+    shutil.rmtree(history_dir, ignore_errors=True)
+    os.replace(tmp_dir, history_dir)
+    print(f"[🗃️] History store built: {len(snapshots.dates)} day(s) in {len(months)} month(s)")
+
+
+def load_history(folder, start=None, end=None, columns=None):
+    """Return snapshot rows with start <= Date <= end (YYYY-MM-DD, inclusive; None = open).
+
+    columns limits the listing columns read; Date is always included.
+    """
+    if not os.path.isdir(_history_dir(folder)):
+        backfill_history(folder)
+    columns = HISTORY_COLUMNS if columns is None else ['Date'] + [c for c in columns if c != 'Date']
+
+    filters = []
+    if start:
+        filters.append(('Date', '>=', start))
+    if end:
+        filters.append(('Date', '<=', end))
+
+    frames = []
+    dates = [date_str for _, date_str in load_snapshot_manifest(folder).between(start, end)]
+    for month, days in _by_month(dates):
+        paths = [_month_path(folder, month)]
+        if not os.path.exists(paths[0]):
+            paths = [_day_path(folder, d) for d in days if os.path.exists(_day_path(folder, d))]
+        for path in paths:
+            frames.append(pq.read_table(path, columns=columns, filters=filters or None).to_pandas())
+
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    history = pd.concat(frames, ignore_index=True)
+    # Files carry their own category sets; re-unify after concatenating.
+    for col in CATEGORICAL_COLUMNS:
+        if col in history:
+            history[col] = history[col].astype('category')
+    return history
+
+
+if __name__ == '__main__':
+    backfill_history(os.path.join(os.path.dirname(__file__), 'data'))
@@ -0,0 +1,153 @@
+"""
+http_client.py
+─────────────────────────────────────────────────────────────────────────────
+Shared HTTP fetch layer for main.py and update_owner_lookup.py.
+
+One pooled requests.Session per process (keep-alive connections reused
+across requests and threads), explicit gzip/deflate negotiation, and bounded
+retries with jittered exponential backoff on connection errors, timeouts and
+transient HTTP statuses. download() also retries a body whose connection
+drops part-way, restarting it into its file. Every attempt's timing is
+appended to RUN_METRICS so each script can report where its network time went.
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import os
+import time
+import random
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0    # seconds before the first retry (before jitter)
+BACKOFF_CAP = 30.0    # longest single wait between attempts
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+POOL_SIZE = 8
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Raised while reading a streamed body when the connection drops or stalls
+BODY_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+# One entry per attempt: url, status (None on a connection error/timeout),
+# seconds until response headers, attempt number, and error text if any.
+RUN_METRICS = []
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers['Accept-Encoding'] = 'gzip, deflate'
+            _session = session
+        return _session
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Seconds to wait before retrying after attempt (1-based): full jitter, capped.
+
+    A numeric Retry-After header from the server takes precedence.
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def fetch(url, timeout, stream=False, headers=None):
+    """GET url through the shared session, retrying transient failures.
+
+    Returns the final Response; non-retryable statuses (e.g. 404) are returned
+    as-is for the caller to raise_for_status(). Raises the last connection
+    error or timeout once MAX_ATTEMPTS is exhausted. Use as a context manager
+    when stream=True so the connection goes back to the pool.
+    """
+    session = get_session()
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        start = time.perf_counter()
+        try:
+            resp = session.get(url, timeout=timeout, stream=stream, headers=headers)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            _record(url, None, start, attempt, e)
+            if attempt == MAX_ATTEMPTS:
+                raise
+            delay = backoff_delay(attempt)
+        else:
+            _record(url, resp.status_code, start, attempt)
+            if resp.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS:
+                return resp
+            delay = backoff_delay(attempt, resp.headers.get('Retry-After'))
+            resp.close()
+        print(f"  [🔁] Attempt {attempt}/{MAX_ATTEMPTS} for {url} failed — retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def download(url, path, timeout, headers=None, opener=open):
+    """GET url and write its (decoded) body to path, retrying dropped connections.
+
+    A connection error or timeout while reading the body restarts the whole
+    request into path, up to MAX_ATTEMPTS. opener opens path for binary
+    writing (e.g. gzip.open to store it compressed). Returns (response,
+    sha256 of the body); nothing is written and the sha256 is None for a 304
+    or an error status, which the caller handles (e.g. raise_for_status()).
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        start = time.perf_counter()
+        digest = hashlib.sha256()
+        with fetch(url, timeout=timeout, stream=True, headers=headers) as resp:
+            if resp.status_code == 304 or not resp.ok:
+                return resp, None
+            try:
+                with opener(path, 'wb') as out:
+                    for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        digest.update(chunk)
+                        out.write(chunk)
+                return resp, digest.hexdigest()
+            except BODY_ERRORS as e:
+                _record(url, None, start, attempt, e)
+                if os.path.exists(path):
+                    os.remove(path)
+                if attempt == MAX_ATTEMPTS:
+                    raise
+            except BaseException:
+                if os.path.exists(path):
+                    os.remove(path)
+                raise
+        delay = backoff_delay(attempt)
+        print(f"  [🔁] Download {attempt}/{MAX_ATTEMPTS} of {url} dropped — restarting in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def _record(url, status, start, attempt, error=None):
+    RUN_METRICS.append({
+        'url': url,
+        'status': status,
+        'seconds': round(time.perf_counter() - start, 3),
+        'attempt': attempt,
+        'error': str(error) if error else '',
+    })
+
+
+def print_run_metrics():
+    """Log one line per request attempt made during this run."""
+    if not RUN_METRICS:
+        return
+    total = sum(m['seconds'] for m in RUN_METRICS)
+    print(f"[⏱️] HTTP: {len(RUN_METRICS)} request(s), {total:.2f}s until response headers")
+    for m in RUN_METRICS:
+        print(f"  {m['status'] or 'ERR':>3}  {m['seconds']:>7.2f}s  attempt {m['attempt']}  {m['url']}")
@@ -0,0 +1,256 @@
+"""
+listing_db.py
+─────────────────────────────────────────────────────────────────────────────
+SQLite listing-history database: data/listing_history.sqlite.
+
+  listings            one row per ULIKey: latest attributes, first/last seen
+  daily_observations  one row per listing per run date: price and status
+  listing_events      listed, price_change, removed, relisted — per run date
+
+Events are derived from the observations themselves, relative to the
+latest earlier run date:
+
+  listed        no earlier observation of the ULIKey at all
+  relisted      observed before, but not on the previous run date
+  price_change  observed on the previous run date at a different price
+  removed       observed on the previous run date, absent today
+
+Recording a date replaces its observations and re-derives the events of
+both that date and the next recorded one, so re-running or replaying any
+date leaves the same observations and events as building from scratch.
+
+The database is built locally (python listing_db.py) from the history
+store and is not committed. Once it exists, main.py records each run in it
+in a single transaction, first catching up on any history-store dates it
+is missing (e.g. days run in CI since the last pull), so events are always
+derived against the true previous run date. Where it does not exist (e.g.
+in CI), main.py skips it.
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from history_store import load_history
+from snapshot_store import load_snapshot_manifest
+
+LISTING_DB_NAME = 'listing_history.sqlite'
+EVENT_TYPES = ['listed', 'price_change', 'removed', 'relisted']
+
+
+def _create_schema(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS listings ("
+        "  ulikey TEXT PRIMARY KEY,"
+        "  address TEXT,"
+        "  village TEXT,"
+        "  county TEXT,"
+        "  model TEXT,"
+        "  bedrooms INTEGER,"
+        "  baths TEXT,"
+        "  square_feet INTEGER,"
+        "  vls_number TEXT,"
+        "  first_seen TEXT NOT NULL,"
+        "  last_seen TEXT NOT NULL"
+        ")"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS daily_observations ("
+        "  obs_date TEXT NOT NULL,"
+        "  ulikey TEXT NOT NULL,"
+        "  price INTEGER,"
+        "  status TEXT,"
+        "  PRIMARY KEY (obs_date, ulikey)"
+        ") WITHOUT ROWID"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS listing_events ("
+        "  event_date TEXT NOT NULL,"
+        "  ulikey TEXT NOT NULL,"
+        "  event TEXT NOT NULL,"
+        "  old_price INTEGER,"
+        "  new_price INTEGER,"
+        "  PRIMARY KEY (event_date, ulikey, event)"
+        ") WITHOUT ROWID"
+    )
+    # obs_date and event_date lead their primary keys, which index them.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_listings_village ON listings (village)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_obs_ulikey ON daily_observations (ulikey, obs_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_ulikey ON listing_events (ulikey, event_date)")
+
+
+def _value(v):
+    """Plain Python value for sqlite3 (pandas NA/NaN → NULL, numpy ints → int)."""
+    if pd.isna(v):
+        return None
+    return v.item() if hasattr(v, 'item') else v
+
+
+def _rows(df, columns):
+    return [tuple(_value(v) for v in row) for row in df[columns].itertuples(index=False)]
+
+
+def _record_day(conn, date_str, df):
+    """Replace date_str's observations with df's listings and re-derive the affected events."""
+    replaced = [row[0] for row in conn.execute(
+        "SELECT ulikey FROM daily_observations WHERE obs_date = ?", (date_str,)
+    )]
+    conn.execute("DELETE FROM daily_observations WHERE obs_date = ?", (date_str,))
+
+    df = df.drop_duplicates('ULIKey', keep='last')
+    conn.executemany(
+        "INSERT INTO daily_observations (obs_date, ulikey, price, status) VALUES (?, ?, ?, ?)",
+        [(date_str, *row) for row in _rows(df, ['ULIKey', 'Price', 'Status'])],
+    )
+    conn.executemany(
+        "INSERT INTO listings (ulikey, address, village, county, model, bedrooms, baths,"
+        "                      square_feet, vls_number, first_seen, last_seen)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        " ON CONFLICT (ulikey) DO UPDATE SET"
+        "  address     = CASE WHEN excluded.last_seen >= last_seen THEN excluded.address     ELSE address     END,"
+        "  village     = CASE WHEN excluded.last_seen >= last_seen THEN excluded.village     ELSE village     END,"
+        "  county      = CASE WHEN excluded.last_seen >= last_seen THEN excluded.county      ELSE county      END,"
+        "  model       = CASE WHEN excluded.last_seen >= last_seen THEN excluded.model       ELSE model       END,"
+        "  bedrooms    = CASE WHEN excluded.last_seen >= last_seen THEN excluded.bedrooms    ELSE bedrooms    END,"
+        "  baths       = CASE WHEN excluded.last_seen >= last_seen THEN excluded.baths       ELSE baths       END,"
+        "  square_feet = CASE WHEN excluded.last_seen >= last_seen THEN excluded.square_feet ELSE square_feet END,"
+        "  vls_number  = CASE WHEN excluded.last_seen >= last_seen THEN excluded.vls_number  ELSE vls_number  END,"
+        "  first_seen  = MIN(first_seen, excluded.first_seen),"
+        "  last_seen   = MAX(last_seen, excluded.last_seen)",
+        [
+            (*row, date_str, date_str)
+            for row in _rows(df, [
+                'ULIKey', 'Address', 'Village', 'County', 'Model', 'Bedrooms', 'Baths',
+                'SquareFeet', 'VLSNumber',
+            ])
+        ],
+    )
+
+    if replaced:
+        # Listings dropped from a replayed date may have lost their first/last
+        # sighting, or their only one.
+        conn.executemany(
+            "UPDATE listings SET"
+            "  first_seen = COALESCE((SELECT MIN(obs_date) FROM daily_observations o"
+            "                         WHERE o.ulikey = listings.ulikey), first_seen),"
+            "  last_seen  = COALESCE((SELECT MAX(obs_date) FROM daily_observations o"
+            "                         WHERE o.ulikey = listings.ulikey), last_seen)"
+            " WHERE ulikey = ?",
+            [(ulikey,) for ulikey in replaced],
+        )
+        conn.executemany(
+            "DELETE FROM listings WHERE ulikey = ?"
+            " AND NOT EXISTS (SELECT 1 FROM daily_observations o WHERE o.ulikey = listings.ulikey)",
+            [(ulikey,) for ulikey in replaced],
+        )
+
+    _derive_events(conn, date_str)
+    next_date = conn.execute(
+        "SELECT MIN(obs_date) FROM daily_observations WHERE obs_date > ?", (date_str,)
+    ).fetchone()[0]
+    if next_date is not None:
+        _derive_events(conn, next_date)
+
+
+def _derive_events(conn, date_str):
+    """Replace date_str's events with those derived from its and the previous run date's observations."""
+    conn.execute("DELETE FROM listing_events WHERE event_date = ?", (date_str,))
+    previous_date = conn.execute(
+        "SELECT MAX(obs_date) FROM daily_observations WHERE obs_date < ?", (date_str,)
+    ).fetchone()[0]
+
+    conn.execute(
+        "INSERT INTO listing_events (event_date, ulikey, event, old_price, new_price)"
+        " SELECT t.obs_date, t.ulikey,"
+        "        CASE WHEN EXISTS (SELECT 1 FROM daily_observations e"
+        "                          WHERE e.ulikey = t.ulikey AND e.obs_date < t.obs_date)"
+        "             THEN 'relisted' ELSE 'listed' END,"
+        "        NULL, t.price"
+        " FROM daily_observations t"
+        " WHERE t.obs_date = ? AND NOT EXISTS ("
+        "   SELECT 1 FROM daily_observations p WHERE p.obs_date = ? AND p.ulikey = t.ulikey)",
+        (date_str, previous_date),
+    )
+    if previous_date is None:
+        return
+
+    conn.execute(
+        "INSERT INTO listing_events (event_date, ulikey, event, old_price, new_price)"
+        " SELECT t.obs_date, t.ulikey, 'price_change', p.price, t.price"
+        " FROM daily_observations t"
+        " JOIN daily_observations p ON p.obs_date = ? AND p.ulikey = t.ulikey"
+        " WHERE t.obs_date = ? AND p.price IS NOT t.price",
+        (previous_date, date_str),
+    )
+    conn.execute(
+        "INSERT INTO listing_events (event_date, ulikey, event, old_price, new_price)"
+        " SELECT ?, p.ulikey, 'removed', p.price, NULL"
+        " FROM daily_observations p"
+        " WHERE p.obs_date = ? AND NOT EXISTS ("
+        "   SELECT 1 FROM daily_observations t WHERE t.obs_date = ? AND t.ulikey = p.ulikey)",
+        (date_str, previous_date, date_str),
+    )
+
+
+def build_listing_db(folder):
+    """Build data/listing_history.sqlite from every day in the history store."""
+    path = os.path.join(folder, LISTING_DB_NAME)
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    history = load_history(folder)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            _create_schema(conn)
+            for date_str, day in history.groupby('Date', sort=True):
+                _record_day(conn, date_str, day)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    print(f"[📈] Listing history DB built: {history['Date'].nunique()} day(s)")
+
+
+def record_listing_day(folder, date_str, df):
+    """Record one run's listings in the listing-history DB in a single transaction.
+
+    History-store dates the DB has no observations for are recorded first,
+    in the same transaction. Returns {event type: count} for date_str, or
+    None when the DB has not been built in this checkout.
+    """
+    path = os.path.join(folder, LISTING_DB_NAME)
+    if not os.path.exists(path):
+        return None
+
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            _create_schema(conn)
+            recorded = {row[0] for row in conn.execute("SELECT DISTINCT obs_date FROM daily_observations")}
+            missing = [
+                d for d in load_snapshot_manifest(folder).dates if d not in recorded and d != date_str
+            ]
+            if missing:
+                history = load_history(folder, start=missing[0], end=missing[-1])
+                history = history[history['Date'].isin(missing)]
+                for missing_date, day in history.groupby('Date', sort=True):
+                    _record_day(conn, missing_date, day)
+                if not history.empty:
+                    print(f"[📈] Listing history DB: caught up on {history['Date'].nunique()} missing day(s)")
+            _record_day(conn, date_str, df)
+        counts = dict(conn.execute(
+            "SELECT event, COUNT(*) FROM listing_events WHERE event_date = ? GROUP BY event",
+            (date_str,),
+        ).fetchall())
+    finally:
+        conn.close()
+    return {event: counts.get(event, 0) for event in EVENT_TYPES}
+
+
+if __name__ == '__main__':
+    build_listing_db(os.path.join(os.path.dirname(__file__), 'data'))
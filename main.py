@@ -1,12 +1,25 @@
 import os
+import gzip
+import hashlib
+import argparse
+import ijson
+import numpy as np
 import pandas as pd
-import requests
 from datetime import datetime
 import re
 import smtplib
 from email.message import EmailMessage
 from email.utils import formataddr
 
+from http_client import download, print_run_metrics
+from owner_index import (
+    build_memory_index, listing_address_keys, normalize_address_series, normalize_county_series,
+    open_owner_index, read_lookup_table,
+)
+from history_store import append_history
+from listing_db import record_listing_day
+from snapshot_store import LISTING_COLUMNS, apply_listing_types, load_snapshot_manifest, write_csv
+
 # ─────────────────────────────────────────────
 # Email config — loaded from GitHub Secrets
 # ─────────────────────────────────────────────
@@ -14,8 +27,10 @@ EMAIL_ADDRESS = os.getenv('EMAIL_ADDRESS')
 EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
 EMAIL_TO = os.getenv('EMAIL_TO')
 
-if not EMAIL_ADDRESS or not EMAIL_PASSWORD or not EMAIL_TO:
-    raise ValueError("❌ Missing EMAIL_ADDRESS, EMAIL_PASSWORD, or EMAIL_TO in GitHub secrets.")
+
+def check_email_config():
+    if not EMAIL_ADDRESS or not EMAIL_PASSWORD or not EMAIL_TO:
+        raise ValueError("❌ Missing EMAIL_ADDRESS, EMAIL_PASSWORD, or EMAIL_TO in GitHub secrets.")
 
 # ─────────────────────────────────────────────
 # Paths
@@ -24,108 +39,386 @@ folder_path = os.path.join(os.path.dirname(__file__), 'data')
 os.makedirs(folder_path, exist_ok=True)
 
 tracking_file = os.path.join(folder_path, 'listing_first_seen.csv')
-owner_lookup_file = os.path.join(folder_path, 'owner_lookup.csv')
+owner_lookup_file = os.path.join(folder_path, 'owner_lookup.parquet')
+legacy_owner_lookup_file = os.path.join(folder_path, 'owner_lookup.csv')
+owner_index_file = os.path.join(folder_path, 'owner_index.sqlite')
+match_cache_file = os.path.join(folder_path, 'owner_match_cache.csv')
+raw_folder_path = os.path.join(folder_path, 'raw')
+run_log_file = os.path.join(folder_path, 'run_log.csv')
+
+# 'delta' stores a full snapshot weekly and only changed rows on other days
+SNAPSHOT_MODE = os.getenv('VLS_SNAPSHOT_MODE', 'full')
 
-SNAPSHOT_PATTERN = re.compile(r"^VLS_(\d{4}-\d{2}-\d{2})\.csv$")
+# 'gzip' writes the snapshot, removed/5-month reports and tracker as .csv.gz
+OUTPUT_COMPRESSION = os.getenv('VLS_OUTPUT_COMPRESSION', 'none')
+
+OWNER_CHANGES_PATTERN = re.compile(r"^owner_changes_(\d{4}-\d{2}-\d{2})\.csv$")
 
 # ─────────────────────────────────────────────
 # Columns to save in daily snapshot
 # ─────────────────────────────────────────────
-LISTING_COLUMNS = [
+# API fields kept per home while streaming the payload (source of LISTING_COLUMNS)
+API_FIELDS = [
     "ULIKey", "Address", "Village", "County", "Model", "Price",
     "Bedrooms", "Baths", "SquareFeet", "Garage", "Pool",
-    "Latitude", "Longitude", "Status", "SaleType",
+    "GISLat", "GISLong", "ListingStatus", "SaleType",
     "YouTubeVideoId", "VLSNumber",
 ]
 
+# API field → snapshot column, where the names differ
+API_RENAMES = {"GISLat": "Latitude", "GISLong": "Longitude", "ListingStatus": "Status"}
+
+REMOVED_COLUMNS = LISTING_COLUMNS + [
+    'OwnerName', 'ParcelID', 'LastSaleDate', 'LastSalePrice', 'SoldConfirmed',
+]
+
+MATCH_CACHE_COLUMNS = ['ULIKey', 'AddrKey', 'PARCEL_ID', 'OwnerName', 'RollId']
+
+RUN_LOG_COLUMNS = ['Date', 'Fingerprint', 'Listings']
+
 
 # ─────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────
-def find_latest_snapshot(folder, today_str):
-    """Return (filepath, date_str) of the most recent snapshot before today."""
-    latest_date = None
-    latest_file = None
-    for filename in os.listdir(folder):
-        match = SNAPSHOT_PATTERN.match(filename)
-        if not match:
-            continue
-        snapshot_date = match.group(1)
-        if snapshot_date >= today_str:
-            continue
-        if latest_date is None or snapshot_date > latest_date:
-            latest_date = snapshot_date
-            latest_file = os.path.join(folder, filename)
-    return latest_file, latest_date
-
-
-def check_removed_listings_against_vls(removed_df, all_homes):
+def output_path(path):
+    """Where a data/ CSV output is written: path, or path + '.gz' when compressing."""
+    return path + '.gz' if OUTPUT_COMPRESSION == 'gzip' else path
+
+
+def find_output(path):
+    """Return the existing plain or gzipped copy of a data/ CSV output, or None."""
+    for candidate in (output_path(path), path, path + '.gz'):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def save_output(df, path):
+    """Write a data/ CSV output in the configured format, removing a copy in the other format."""
+    target = output_path(path)
+    write_csv(df, target)
+    for other in (path, path + '.gz'):
+        if other != target and os.path.exists(other):
+            os.remove(other)
+
+
+def parse_home_listings(stream):
+    """Incrementally parse an allhomelisting JSON payload from a file-like stream.
+
+    Iterates the HomeList array one record at a time instead of loading the whole
+    payload. Returns (total homes, set of every ULIKey, PreOwned & Active homes
+    projected to API_FIELDS).
+    """
+    total_homes = 0
+    all_ulikeys = set()
+    filtered_homes = []
+    for home in ijson.items(stream, 'HomeList.item', use_float=True):
+        total_homes += 1
+        all_ulikeys.add(home.get("ULIKey"))
+        if home.get("SaleType") == "P" and home.get("ListingStatus") == "A":
+            filtered_homes.append({field: home.get(field) for field in API_FIELDS})
+    return total_homes, all_ulikeys, filtered_homes
+
+
+def raw_payload_path(date_str):
+    return os.path.join(raw_folder_path, f'allhomelisting_{date_str}.json.gz')
+
+
+def fetch_and_archive_listings(url, date_str):
+    """Download the allhomelisting payload gzipped into data/raw/, then stream-parse the archive.
+
+    The download restarts if the connection drops part-way, and the archive is
+    only kept once the whole payload has parsed. Returns what
+    parse_home_listings returns.
+    """
+    os.makedirs(raw_folder_path, exist_ok=True)
+    archive_path = raw_payload_path(date_str)
+    tmp_path = archive_path + '.tmp'
+    response, _ = download(url, tmp_path, timeout=30, opener=gzip.open)
+    response.raise_for_status()
+    try:
+        with gzip.open(tmp_path, 'rb') as stream:
+            parsed = parse_home_listings(stream)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, archive_path)
+    print(f"[🗄️] Raw payload archived: raw/{os.path.basename(archive_path)}")
+    return parsed
+
+
+def replay_archived_listings(date_str):
+    """Parse the archived allhomelisting payload for date_str instead of calling the API."""
+    archive_path = raw_payload_path(date_str)
+    if not os.path.exists(archive_path):
+        raise FileNotFoundError(f"❌ No archived payload for {date_str}: {archive_path}")
+    print(f"[🔁] Replaying raw/{os.path.basename(archive_path)} — no network, no email")
+    with gzip.open(archive_path, 'rb') as stream:
+        return parse_home_listings(stream)
+
+
+def build_listing_frame(homes):
+    """Build the snapshot DataFrame column-wise from API records, with typed columns."""
+    df = pd.DataFrame.from_records(homes, columns=API_FIELDS).rename(columns=API_RENAMES)
+    df['Price'] = df['Price'].astype('string').str.replace(r'[$,]', '', regex=True)
+    return apply_listing_types(df[LISTING_COLUMNS])
+
+
+def check_removed_listings_against_vls(removed_df, all_ulikeys):
     """Confirm listings are truly gone from the full API (not just filtered out)."""
-    all_ulikeys = {home.get("ULIKey") for home in all_homes}
     return removed_df[~removed_df['ULIKey'].isin(all_ulikeys)]
 
 
-def normalize_address(addr):
-    """Normalize an address string for matching (uppercase, strip extra spaces)."""
-    if not addr or not isinstance(addr, str):
-        return ''
-    addr = re.sub(r'\b(APT|UNIT|STE|#)\s*\S+', '', addr, flags=re.IGNORECASE)
-    addr = re.sub(r'\s+', ' ', addr).strip().upper()
-    return addr
-
-
 def load_owner_lookup():
-    if not os.path.exists(owner_lookup_file):
-        print("[⚠️] owner_lookup.csv not found. Run update_owner_lookup.py first.")
+    """Open the owner index, falling back to building one from the owner lookup table."""
+    if os.path.exists(owner_index_file):
+        index = open_owner_index(owner_index_file)
+        print(f"[✅] Owner index opened: {len(index):,} addresses across counties")
+        return index
+
+    lookup_path = next(
+        (path for path in (owner_lookup_file, legacy_owner_lookup_file) if os.path.exists(path)),
+        None,
+    )
+    if lookup_path is None:
+        print("[⚠️] owner_lookup.parquet not found. Run update_owner_lookup.py first.")
         print("     Owner names will NOT be added this run.")
-        return {}
+        return None
 
-    df = pd.read_csv(owner_lookup_file, dtype=str, low_memory=False)
-    df['FULL_PHY_ADDR'] = df['FULL_PHY_ADDR'].fillna('').str.upper().str.strip()
-    df['OWN_NAME'] = df['OWN_NAME'].fillna('').str.strip()
+    df = read_lookup_table(lookup_path, ['PARCEL_ID', 'COUNTY', 'FULL_PHY_ADDR', 'OWN_NAME'])
+    index = build_memory_index(df)
+    print(f"[✅] Owner lookup loaded: {len(index):,} addresses across counties")
+    return index
 
-    lookup = {}
-    for _, row in df.iterrows():
-        addr_key = normalize_address(row['FULL_PHY_ADDR'])
-        if addr_key:
-            lookup[addr_key] = row['OWN_NAME']
 
-    print(f"[✅] Owner lookup loaded: {len(lookup):,} addresses across counties")
-    return lookup
+def match_owners(keys, counties, owner_lookup):
+    """Owner lookup over address keys: one join for exact matches, prefix fallback for the rest.
 
+    Returns a DataFrame with OwnerName and PARCEL_ID aligned to keys ('' when unmatched).
+    """
+    lookups = pd.Series(list(zip(counties, keys)), index=keys.index, dtype=object)
+    matches = lookups.map(owner_lookup.get_many(set(lookups))).astype(object)
+
+    misses = matches.isna() & (keys.str.len() >= 10)
+    if misses.any():
+        prefixes = pd.Series(
+            list(zip(counties[misses], keys[misses].str[:15])), index=keys[misses].index, dtype=object
+        )
+        fallback = {
+            (county, prefix): owner_lookup.first_with_prefix(prefix, county)
+            for county, prefix in set(prefixes)
+        }
+        matches[misses] = prefixes.map(fallback)
+
+    return pd.DataFrame({
+        'OwnerName': matches.map(lambda m: m[0] if isinstance(m, tuple) else ''),
+        'PARCEL_ID': matches.map(lambda m: m[1] if isinstance(m, tuple) else ''),
+    }, index=keys.index)
 
-def lookup_owner(address, owner_lookup):
-    if not address or not owner_lookup:
-        return ''
-    street = address.split(',')[0].strip()
-    normalized = normalize_address(street)
-    if normalized in owner_lookup:
-        return owner_lookup[normalized]
-    for key, name in owner_lookup.items():
-        if len(normalized) >= 10 and key.startswith(normalized[:15]):
-            return name
-    return ''
 
+def load_match_cache(owner_lookup):
+    """Load cached ULIKey → parcel matches made against the current owner roll.
+
+    Returns {ULIKey: (address key, PARCEL_ID, OwnerName)}. Entries from an older
+    roll are dropped so they get re-matched against the new one.
+    """
+    if not owner_lookup or not os.path.exists(match_cache_file):
+        return {}
 
-def add_owner_names(df, owner_lookup):
-    """Add OwnerName column to a DataFrame of listings."""
+    cache = pd.read_csv(match_cache_file, dtype=str, keep_default_na=False)
+    current = cache[cache['RollId'] == owner_lookup.roll_id]
+    stale = cache[cache['RollId'] != owner_lookup.roll_id]
+    if not stale.empty:
+        carried = carry_over_matches(stale, owner_lookup.roll_id)
+        current = pd.concat([current, carried], ignore_index=True)
+        print(f"[♻️] Owner roll changed — kept {len(carried)} of {len(stale)} cached match(es)")
+
+    return {
+        ulikey: (addr_key, parcel_id, name)
+        for ulikey, addr_key, parcel_id, name in zip(
+            current['ULIKey'], current['AddrKey'], current['PARCEL_ID'], current['OwnerName']
+        )
+    }
+
+
+def carry_over_matches(stale, roll_id):
+    """Keep cached matches from the previous roll that its delta file leaves untouched.
+
+    Uses the owner_changes_*.csv written by update_owner_lookup.py when it goes
+    exactly from the cache's roll to roll_id. A match is dropped if its parcel was
+    changed or removed, or if a parcel was added at its address; unmatched
+    entries are dropped whenever any parcel was added. Without a matching delta
+    nothing is carried over.
+    """
+    from_rolls = stale['RollId'].unique()
+    delta_files = sorted(
+        (name for name in os.listdir(folder_path) if OWNER_CHANGES_PATTERN.match(name)),
+        reverse=True,
+    )
+    delta = None
+    for name in delta_files:
+        candidate = pd.read_csv(os.path.join(folder_path, name), dtype=str, keep_default_na=False)
+        if candidate.empty:
+            continue
+        if (candidate['TO_ROLL'].iloc[0] == roll_id
+                and len(from_rolls) == 1 and candidate['FROM_ROLL'].iloc[0] == from_rolls[0]):
+            delta = candidate
+            break
+    if delta is None:
+        return stale.iloc[0:0]
+
+    touched = set(delta.loc[delta['CHANGE'] != 'added', 'PARCEL_ID'])
+    added = delta[delta['CHANGE'] == 'added']
+    added_keys = set(normalize_address_series(added['FULL_PHY_ADDR']))
+    keep = (
+        ~stale['PARCEL_ID'].isin(touched)
+        & ~stale['AddrKey'].isin(added_keys)
+        & ((stale['PARCEL_ID'] != '') | added.empty)
+    )
+    return stale[keep].assign(RollId=roll_id)
+
+
+def save_match_cache(match_cache, owner_lookup, active_ulikeys):
+    """Write the match cache back to data/, tagged with the current roll.
+
+    Only still-active listings are kept; removed ones will not be looked up again.
+    """
+    if not owner_lookup:
+        return
+    active = {str(ulikey) for ulikey in active_ulikeys}
+    pd.DataFrame(
+        [
+            (ulikey, *entry, owner_lookup.roll_id)
+            for ulikey, entry in match_cache.items() if ulikey in active
+        ],
+        columns=MATCH_CACHE_COLUMNS,
+    ).to_csv(match_cache_file, index=False, encoding='utf-8-sig')
+
+
+def add_owner_names(df, owner_lookup, match_cache=None, counties=None):
+    """Add OwnerName and ParcelID columns to a DataFrame of listings.
+
+    Each listing is matched only against its own county's parcels, taken from
+    counties (aligned to df) or else df['County'] when present.
+
+    Listings already in match_cache under the same address key reuse their cached
+    match; the rest are matched against the owner index and added to the cache.
+    """
     if not owner_lookup:
         df['OwnerName'] = ''
+        df['ParcelID'] = ''
         return df
-    df['OwnerName'] = df['Address'].apply(lambda addr: lookup_owner(addr, owner_lookup))
+    if match_cache is None:
+        match_cache = {}
+    if counties is None:
+        counties = df['County'] if 'County' in df else pd.Series('', index=df.index)
+
+    ulikeys = df['ULIKey'].astype(str)
+    keys = listing_address_keys(df['Address'])
+    counties = normalize_county_series(pd.Series(counties, index=df.index))
+    cached = [match_cache.get(ulikey) for ulikey in ulikeys]
+    hit = pd.Series(
+        [entry is not None and entry[0] == key for entry, key in zip(cached, keys)],
+        index=df.index,
+    )
+    names = pd.Series([entry[2] if entry else '' for entry in cached], index=df.index)
+    parcels = pd.Series([entry[1] if entry else '' for entry in cached], index=df.index)
+
+    if (~hit).any():
+        found = match_owners(keys[~hit], counties[~hit], owner_lookup)
+        names[~hit] = found['OwnerName']
+        parcels[~hit] = found['PARCEL_ID']
+        for ulikey, key, parcel_id, name in zip(
+            ulikeys[~hit], keys[~hit], found['PARCEL_ID'], found['OwnerName']
+        ):
+            match_cache[ulikey] = (key, parcel_id, name)
+
+    df['OwnerName'] = names.to_numpy()
+    df['ParcelID'] = parcels.to_numpy()
     matched = (df['OwnerName'] != '').sum()
-    print(f"[👤] Owner names matched: {matched}/{len(df)} listings ({matched/max(len(df),1)*100:.0f}%)")
+    print(f"[👤] Owner names matched: {matched}/{len(df)} listings ({matched/max(len(df),1)*100:.0f}%)"
+          f" — {int(hit.sum())} from cache")
     return df
 
 
+def add_sale_info(df, owner_lookup):
+    """Add the parcel's latest DOR sale to removed listings.
+
+    LastSaleDate (YYYY-MM) and LastSalePrice come from the SDF sales stored in the
+    owner index, joined on County + ParcelID. SoldConfirmed is True when that sale
+    falls in or after the month the listing was first seen; listings with no
+    first-seen month are never confirmed.
+    """
+    df['LastSaleDate'] = ''
+    df['LastSalePrice'] = ''
+    df['SoldConfirmed'] = False
+    if not owner_lookup or df.empty:
+        return df
+
+    parcels = list(zip(normalize_county_series(df['County']), df['ParcelID'].astype(str)))
+    sales = owner_lookup.latest_sales([p for p in parcels if p[1]])
+    if not sales:
+        return df
+
+    found = [sales.get(p) for p in parcels]
+    df['LastSaleDate'] = [sale[0] if sale else '' for sale in found]
+    df['LastSalePrice'] = [sale[1] if sale and sale[1] is not None else '' for sale in found]
+
+    listed_month = df['ULIKey'].astype(str).map(load_first_seen()).fillna('')
+    df['SoldConfirmed'] = (
+        (df['LastSaleDate'] != '') & (listed_month != '') & (df['LastSaleDate'] >= listed_month)
+    )
+    print(f"[🏷️] Confirmed sales (DOR SDF): {int(df['SoldConfirmed'].sum())}/{len(df)} removed listings")
+    return df
+
+
+def load_first_seen():
+    """Return {ULIKey: 'YYYY-MM'} of the month each tracked listing was first seen."""
+    tracking_path = find_output(tracking_file)
+    if tracking_path is None:
+        return {}
+    tracking = pd.read_csv(tracking_path, usecols=['ULIKey', 'FirstSeen'], dtype=str)
+    return dict(zip(tracking['ULIKey'], tracking['FirstSeen'].str[:7]))
+
+
+def listing_fingerprint(df):
+    """Order-independent hash of the projected listing rows."""
+    row_hashes = np.sort(pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy())
+    return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+
+def load_run_fingerprint(date_str):
+    """Return the listing fingerprint recorded for the run on date_str, or None."""
+    if not os.path.exists(run_log_file):
+        return None
+    runs = pd.read_csv(run_log_file, dtype=str)
+    recorded = runs.loc[runs['Date'] == date_str, 'Fingerprint']
+    return recorded.iloc[-1] if not recorded.empty else None
+
+
+def save_run_fingerprint(date_str, fingerprint, listings):
+    """Record this run's listing fingerprint in data/run_log.csv (one row per date)."""
+    runs = (
+        pd.read_csv(run_log_file, dtype=str) if os.path.exists(run_log_file)
+        else pd.DataFrame(columns=RUN_LOG_COLUMNS)
+    )
+    runs = runs[runs['Date'] != date_str]
+    runs = pd.concat(
+        [runs, pd.DataFrame([[date_str, fingerprint, listings]], columns=RUN_LOG_COLUMNS)],
+        ignore_index=True,
+    ).sort_values('Date')
+    runs.to_csv(run_log_file, index=False, encoding='utf-8-sig')
+
+
 def build_removed_table(truly_removed_df):
     """Build a plain-text table of removed listings for the email body."""
     if truly_removed_df is None or truly_removed_df.empty:
         return "  No removed listings today.\n"
 
     lines = []
-    lines.append(f"  {'ADDRESS':<40} {'VILLAGE':<20} {'COUNTY':<10} {'PRICE':>10}  {'BED/BATH':<10}  {'SQFT':>6}  {'VLS#':<10}")
-    lines.append("  " + "-" * 118)
+    lines.append(f"  {'ADDRESS':<40} {'VILLAGE':<20} {'COUNTY':<10} {'PRICE':>10}  {'BED/BATH':<10}  {'SQFT':>6}  {'VLS#':<10}  {'SOLD':<7}")
+    lines.append("  " + "-" * 127)
 
     for _, row in truly_removed_df.iterrows():
         address = str(row.get('Address', 'N/A'))[:38]
@@ -135,6 +428,7 @@ def build_removed_table(truly_removed_df):
         bath    = str(row.get('Baths', '?'))
         sqft    = str(row.get('SquareFeet', 'N/A'))
         vls     = str(row.get('VLSNumber', 'N/A'))
+        sold    = str(row.get('LastSaleDate', '')) if row.get('SoldConfirmed', False) else ''
 
         raw_price = str(row.get('Price', ''))
         try:
@@ -143,7 +437,7 @@ def build_removed_table(truly_removed_df):
             price = 'N/A'
 
         bedbath = f"{bed}bd/{bath}ba"
-        lines.append(f"  {address:<40} {village:<20} {county:<10} {price:>10}  {bedbath:<10}  {sqft:>6}  {vls:<10}")
+        lines.append(f"  {address:<40} {village:<20} {county:<10} {price:>10}  {bedbath:<10}  {sqft:>6}  {vls:<10}  {sold:<7}")
 
     return "\n".join(lines) + "\n"
 
@@ -160,9 +454,11 @@ def send_email_with_attachments(subject, body, attachments):
         if not os.path.exists(file_path):
             print(f"[⚠️] Attachment not found, skipping: {file_path}")
             continue
-        with open(file_path, 'rb') as f:
+        # Compressed outputs are attached as plain CSV
+        opener = gzip.open if file_path.endswith('.gz') else open
+        with opener(file_path, 'rb') as f:
             file_data = f.read()
-        file_name = os.path.basename(file_path)
+        file_name = os.path.basename(file_path).removesuffix('.gz')
         msg.add_attachment(file_data, maintype='application', subtype='octet-stream', filename=file_name)
 
     with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
@@ -173,106 +469,109 @@ def send_email_with_attachments(subject, body, attachments):
 # ─────────────────────────────────────────────
 # Main
 # ─────────────────────────────────────────────
-def main():
+def main(replay_date=None):
+    """Run the daily pipeline; with replay_date, rebuild that day's outputs from its archived payload."""
+    if not replay_date:
+        check_email_config()
     print("[▶️] Script started")
+    run_time = datetime.strptime(replay_date, '%Y-%m-%d') if replay_date else datetime.now()
+    today = run_time.strftime('%Y-%m-%d')
+    today_date = run_time.date()
 
     # ── 1. Load owner lookup ───────────────────────────────────────────────
     owner_lookup = load_owner_lookup()
+    match_cache = load_match_cache(owner_lookup)
 
     # ── 2. Fetch today's VLS data ──────────────────────────────────────────
-    url = "https://api.thevillages.com/hf/search/allhomelisting"
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    data = response.json()
-
-    all_homes = data.get("HomeList", [])
-    print(f"[✅] Total homes received from API: {len(all_homes)}")
+    if replay_date:
+        total_homes, all_ulikeys, filtered_homes = replay_archived_listings(replay_date)
+    else:
+        url = "https://api.thevillages.com/hf/search/allhomelisting"
+        total_homes, all_ulikeys, filtered_homes = fetch_and_archive_listings(url, today)
 
-    filtered_homes = [
-        home for home in all_homes
-        if home.get("SaleType") == "P" and home.get("ListingStatus") == "A"
-    ]
+    print(f"[✅] Total homes received from API: {total_homes}")
     print(f"[🏡] Filtered PreOwned & Active homes: {len(filtered_homes)}")
 
     # ── 3. Build today's DataFrame ─────────────────────────────────────────
-    today = datetime.now().strftime('%Y-%m-%d')
-    today_date = datetime.now().date()
-
-    df_today = pd.DataFrame([{
-        "ULIKey":         home.get("ULIKey"),
-        "Address":        home.get("Address"),
-        "Village":        home.get("Village"),
-        "County":         home.get("County"),
-        "Model":          home.get("Model"),
-        "Price":          home.get("Price", "").replace("$", "").replace(",", "") if home.get("Price") else "",
-        "Bedrooms":       home.get("Bedrooms"),
-        "Baths":          home.get("Baths"),
-        "SquareFeet":     home.get("SquareFeet"),
-        "Garage":         home.get("Garage"),
-        "Pool":           home.get("Pool"),
-        "Latitude":       home.get("GISLat"),
-        "Longitude":      home.get("GISLong"),
-        "Status":         home.get("ListingStatus"),
-        "SaleType":       home.get("SaleType"),
-        "YouTubeVideoId": home.get("YouTubeVideoId"),
-        "VLSNumber":      home.get("VLSNumber"),
-    } for home in filtered_homes], columns=LISTING_COLUMNS)
+    df_today = build_listing_frame(filtered_homes)
 
     # ── 4. Save today's snapshot ───────────────────────────────────────────
-    today_filename = f'VLS_{today}.csv'
-    today_full_path = os.path.join(folder_path, today_filename)
-    df_today.to_csv(today_full_path, index=False, encoding='utf-8-sig')
+    snapshots = load_snapshot_manifest(folder_path)
+    previous_snapshot_path, previous_snapshot_date = snapshots.latest_before(today)
+    # Replaying a date older than the latest run must leave the live tracker
+    # and match cache, which later runs have moved on from, untouched.
+    past_replay = bool(replay_date) and bool(snapshots.dates) and today < snapshots.dates[-1]
+    is_first_run = previous_snapshot_path is None
+
+    # Same listing set as the previous run: nothing can have been removed or
+    # added, so only the DaysOnMarket-derived outputs need rebuilding.
+    fingerprint = listing_fingerprint(df_today)
+    unchanged = not is_first_run and load_run_fingerprint(previous_snapshot_date) == fingerprint
+
+    if unchanged:
+        print(f"[⏩] Listing set unchanged since {previous_snapshot_date} — "
+              f"skipping removal check and tracker rebuild")
+    today_full_path = snapshots.write(
+        today, df_today, delta=SNAPSHOT_MODE == 'delta', compress=OUTPUT_COMPRESSION == 'gzip',
+        same_as_previous=unchanged,
+    )
+    today_filename = os.path.basename(today_full_path)
+    append_history(folder_path, today, df_today)
     print(f"[💾] Today's snapshot saved: {today_filename}")
+    events = record_listing_day(folder_path, today, df_today)
+    if events is not None:
+        print(f"[📈] Listing history DB: {events['listed']} listed, {events['relisted']} relisted, "
+              f"{events['price_change']} price change(s), {events['removed']} removed")
 
     # ── 5. Load previous snapshot ──────────────────────────────────────────
-    previous_snapshot_path, previous_snapshot_date = find_latest_snapshot(folder_path, today)
-    is_first_run = previous_snapshot_path is None
-
     if is_first_run:
         print("[⚠️] No prior snapshot found — this is a baseline run. Skipping removal check.")
         df_previous = pd.DataFrame(columns=LISTING_COLUMNS)
-    else:
-        df_previous = pd.read_csv(previous_snapshot_path)
-        print(f"[✅] Previous snapshot loaded: VLS_{previous_snapshot_date}.csv ({len(df_previous)} listings)")
+    elif not unchanged:
+        # Only the diff keys for now; full rows are read for removed listings only
+        df_previous = snapshots.read(previous_snapshot_date, columns=['ULIKey', 'Status'])
+        print(f"[✅] Previous snapshot loaded: {os.path.basename(previous_snapshot_path)} ({len(df_previous)} listings)")
 
     # ── 6. Detect removed listings ─────────────────────────────────────────
     removed_filename = f'VLS_removed_{today}.csv'
     removed_full_path = os.path.join(folder_path, removed_filename)
     expired_count = 0
+    confirmed_sold_count = 0
     truly_removed_df = None
 
-    if not is_first_run:
+    if not is_first_run and not unchanged:
         df_previous_active = df_previous[df_previous['Status'] == 'A']
         removed_candidates = df_previous_active[~df_previous_active['ULIKey'].isin(df_today['ULIKey'])]
 
         if not removed_candidates.empty:
-            truly_removed_df = check_removed_listings_against_vls(removed_candidates, all_homes)
+            truly_removed_df = check_removed_listings_against_vls(removed_candidates, all_ulikeys)
             expired_count = len(truly_removed_df)
 
             if expired_count > 0:
-                truly_removed_df = add_owner_names(truly_removed_df.copy(), owner_lookup)
-                truly_removed_df.to_csv(removed_full_path, index=False, encoding='utf-8-sig')
+                truly_removed_df = snapshots.read(
+                    previous_snapshot_date, ulikeys=set(truly_removed_df['ULIKey'])
+                )
+                truly_removed_df = truly_removed_df[truly_removed_df['Status'] == 'A']
+                truly_removed_df = add_owner_names(truly_removed_df.copy(), owner_lookup, match_cache)
+                truly_removed_df = add_sale_info(truly_removed_df, owner_lookup)
+                confirmed_sold_count = int(truly_removed_df['SoldConfirmed'].sum())
+                save_output(truly_removed_df, removed_full_path)
                 print(f"[📂] {expired_count} removed listing(s) saved: {removed_filename}")
             else:
                 print("[✅] No truly removed listings found today.")
-                pd.DataFrame(columns=LISTING_COLUMNS + ['OwnerName']).to_csv(
-                    removed_full_path, index=False, encoding='utf-8-sig'
-                )
+                save_output(pd.DataFrame(columns=REMOVED_COLUMNS), removed_full_path)
         else:
             print("[✅] No removed listings detected today.")
-            pd.DataFrame(columns=LISTING_COLUMNS + ['OwnerName']).to_csv(
-                removed_full_path, index=False, encoding='utf-8-sig'
-            )
+            save_output(pd.DataFrame(columns=REMOVED_COLUMNS), removed_full_path)
     else:
-        pd.DataFrame(columns=LISTING_COLUMNS + ['OwnerName']).to_csv(
-            removed_full_path, index=False, encoding='utf-8-sig'
-        )
+        save_output(pd.DataFrame(columns=REMOVED_COLUMNS), removed_full_path)
 
     # ── 7. Update listing age tracking ────────────────────────────────────
     print("[🕒] Updating listing age tracker...")
 
-    if os.path.exists(tracking_file):
-        df_tracking = pd.read_csv(tracking_file)
+    tracking_path = find_output(tracking_file)
+    if tracking_path:
+        df_tracking = pd.read_csv(tracking_path)
         print(f"[✅] Loaded tracking data: {len(df_tracking)} listings")
     else:
         df_tracking = pd.DataFrame(columns=['ULIKey', 'FirstSeen', 'Address', 'Village', 'Price', 'VLSNumber'])
@@ -280,16 +579,17 @@ def main():
 
     existing_ulikeys = set(df_tracking['ULIKey'].values)
     new_listings = []
-    for _, home in df_today.iterrows():
-        if home['ULIKey'] not in existing_ulikeys:
-            new_listings.append({
-                'ULIKey':    home['ULIKey'],
-                'FirstSeen': today,
-                'Address':   home['Address'],
-                'Village':   home['Village'],
-                'Price':     home['Price'],
-                'VLSNumber': home['VLSNumber'],
-            })
+    if not unchanged:
+        for _, home in df_today.iterrows():
+            if home['ULIKey'] not in existing_ulikeys:
+                new_listings.append({
+                    'ULIKey':    home['ULIKey'],
+                    'FirstSeen': today,
+                    'Address':   home['Address'],
+                    'Village':   home['Village'],
+                    'Price':     home['Price'],
+                    'VLSNumber': home['VLSNumber'],
+                })
 
     if new_listings:
         df_tracking = pd.concat([df_tracking, pd.DataFrame(new_listings)], ignore_index=True)
@@ -302,8 +602,11 @@ def main():
         lambda d: (today_date - d.date()).days if pd.notna(d) else None
     )
 
-    df_tracking.to_csv(tracking_file, index=False, encoding='utf-8-sig')
-    print(f"[💾] Tracking database saved: {len(df_tracking)} total listings")
+    if past_replay:
+        print(f"[🔁] Replaying a past date — tracking database left as of {snapshots.dates[-1]}")
+    else:
+        save_output(df_tracking, tracking_file)
+        print(f"[💾] Tracking database saved: {len(df_tracking)} total listings")
 
     # ── 8. Build 5-month aged listings report ─────────────────────────────
     active_ulikeys = set(df_today['ULIKey'].tolist())
@@ -313,11 +616,15 @@ def main():
     ].sort_values(by='DaysOnMarket', ascending=False).copy()
 
     if not aged_listings.empty:
-        aged_listings = add_owner_names(aged_listings, owner_lookup)
+        aged_counties = aged_listings['ULIKey'].map(df_today.set_index('ULIKey')['County'])
+        aged_listings = add_owner_names(aged_listings, owner_lookup, match_cache, aged_counties)
 
     aged_filename = f'VLS_5month_{today}.csv'
     aged_full_path = os.path.join(folder_path, aged_filename)
-    aged_listings.to_csv(aged_full_path, index=False, encoding='utf-8-sig')
+    save_output(aged_listings, aged_full_path)
+    if not past_replay:
+        save_match_cache(match_cache, owner_lookup, active_ulikeys)
+    save_run_fingerprint(today, fingerprint, len(df_today))
 
     if not aged_listings.empty:
         print(f"[🏠] {len(aged_listings)} listing(s) on market 5+ months → {aged_filename}")
@@ -337,7 +644,7 @@ def main():
             f"Today's snapshot has been saved as {today_filename}.\n"
             f"Tomorrow's run will begin detecting removed/sold listings.\n\n"
             f"─────────────────────────────\n"
-            f"Total homes from API:          {len(all_homes)}\n"
+            f"Total homes from API:          {total_homes}\n"
             f"PreOwned & Active filtered:    {len(filtered_homes)}\n"
             f"Tracking DB initialized with:  {len(df_tracking)} listings\n"
             f"Owner lookup:                  {owner_lookup_status}\n"
@@ -346,11 +653,12 @@ def main():
         email_body = (
             f"Daily VLS Tracker run complete.\n\n"
             f"─────────────────────────────\n"
-            f"Total homes from API:          {len(all_homes)}\n"
+            f"Total homes from API:          {total_homes}\n"
             f"PreOwned & Active filtered:    {len(filtered_homes)}\n"
             f"New listings added to tracker: {len(new_listings)}\n"
             f"Total tracked listings:        {len(df_tracking)}\n"
             f"Removed (sold/expired) today:  {expired_count}\n"
+            f"Confirmed sold (DOR sales):    {confirmed_sold_count}\n"
             f"Listings on market 5+ months:  {len(aged_listings)}\n"
             f"Owner lookup:                  {owner_lookup_status}\n"
             f"─────────────────────────────\n\n"
@@ -363,11 +671,24 @@ def main():
             f"  • {aged_filename}    — listings active 150+ days\n"
         )
 
-    attachments = [removed_full_path, aged_full_path]
-    send_email_with_attachments(email_subject, email_body, attachments)
-    print("[✉️] Email sent successfully.")
+    attachments = [output_path(removed_full_path), output_path(aged_full_path)]
+    if replay_date:
+        print(f"[🔁] Replay of {replay_date} complete — email not sent.")
+    else:
+        send_email_with_attachments(email_subject, email_body, attachments)
+        print("[✉️] Email sent successfully.")
+    print_run_metrics()
     print("[✅] Script complete.")
 
 
+def _run_date(value):
+    return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+
+
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Daily VLS tracker run.")
+    parser.add_argument(
+        '--replay', metavar='YYYY-MM-DD', type=_run_date,
+        help="rebuild that day's outputs from its payload in data/raw/ (no network, no email)",
+    )
+    main(replay_date=parser.parse_args().replay)
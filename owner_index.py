@@ -0,0 +1,303 @@
+"""
+owner_index.py
+─────────────────────────────────────────────────────────────────────────────
+Shared owner-name index used by both scripts.
+
+update_owner_lookup.py writes data/owner_index.sqlite once a week: one row
+per county + normalized physical address with the owner's name, plus an
+index on (county, address key). main.py opens it read-only and queries just
+the listing addresses it needs, each only against its own county's parcels.
+
+Rows are inserted in the same order a dict filled row by row would keep
+(first occurrence of an address, last owner seen for it), so "first match"
+for prefix lookups means lowest rowid.
+
+Each index carries a roll_id ("{NAL year}-{content hash}") that changes
+only when the underlying owner roll does; main.py tags its match cache
+with it.
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Upper bound for prefix range scans: sorts after every real character.
+_PREFIX_END = '\U0010ffff'
+
+# Repeated on every parcel row; dictionary-encoded in owner_lookup.parquet.
+LOOKUP_CATEGORICAL_COLS = ['CO_NO', 'COUNTY', 'PHY_CITY', 'PHY_ZIPCD']
+
+
+def normalize_address(addr):
+    """Normalize an address string for matching (uppercase, strip extra spaces)."""
+    if not addr or not isinstance(addr, str):
+        return ''
+    addr = re.sub(r'\b(APT|UNIT|STE|#)\s*\S+', '', addr, flags=re.IGNORECASE)
+    addr = re.sub(r'\s+', ' ', addr).strip().upper()
+    return addr
+
+
+def normalize_address_series(addresses):
+    """Vectorized normalize_address over a pandas Series of addresses."""
+    return (
+        addresses.fillna('').astype(str)
+        .str.replace(r'\b(APT|UNIT|STE|#)\s*\S+', '', regex=True, flags=re.IGNORECASE)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+        .str.upper()
+    )
+
+
+def listing_address_keys(addresses):
+    """Normalized street-address keys for a Series of VLS listing addresses."""
+    streets = addresses.fillna('').astype(str).str.split(',').str[0]
+    return normalize_address_series(streets)
+
+
+def normalize_county_series(counties):
+    """Uppercase county names so listing County matches parcel COUNTY."""
+    return counties.astype(object).fillna('').astype(str).str.strip().str.upper()
+
+
+def owner_rows(df):
+    """Collapse a lookup DataFrame into own_name/parcel_id rows by (county, address key).
+
+    Same semantics as filling a dict row by row: keys keep the position of
+    their first occurrence, values come from their last occurrence.
+    """
+    keys = normalize_address_series(df['FULL_PHY_ADDR'])
+    counties = normalize_county_series(df['COUNTY']) if 'COUNTY' in df else pd.Series('', index=df.index)
+    rows = pd.DataFrame({
+        'own_name': df['OWN_NAME'].fillna('').str.strip(),
+        'parcel_id': df['PARCEL_ID'].fillna('').str.strip() if 'PARCEL_ID' in df else '',
+    })
+    has_key = keys != ''
+    return rows[has_key].groupby(
+        [counties[has_key].rename('county'), keys[has_key].rename('addr_key')], sort=False
+    ).last()
+
+
+def roll_fingerprint(rows, nal_year=None):
+    """Identify an owner roll by NAL year and a hash of its indexed rows."""
+    hashed = pd.util.hash_pandas_object(rows, index=True).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes()).hexdigest()[:12]
+    return f"{nal_year or 'csv'}-{digest}"
+
+
+def write_lookup_table(df, path):
+    """Write the owner lookup table as zstd-compressed Parquet, replacing path atomically.
+
+    Low-cardinality columns are stored as categoricals, which Parquet
+    dictionary-encodes.
+    """
+    df = df.copy()
+    for col in LOOKUP_CATEGORICAL_COLS:
+        if col in df:
+            df[col] = df[col].astype('category')
+    tmp_path = path + '.tmp'
+    df.to_parquet(tmp_path, engine='pyarrow', compression='zstd', index=False)
+    os.replace(tmp_path, path)
+
+
+def read_lookup_table(path, columns):
+    """Read selected columns of the owner lookup table (Parquet, or a legacy CSV)."""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, engine='pyarrow', columns=columns)
+    return pd.read_csv(path, usecols=columns, dtype=str, low_memory=False)
+
+
+def read_lookup_batches(path, columns, batch_rows=100_000):
+    """Yield selected columns of the owner lookup table in batches of batch_rows."""
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, dtype=str, chunksize=batch_rows)
+
+
+def _create_schema(conn):
+    conn.execute(
+        "CREATE TABLE owners ("
+        "  county TEXT NOT NULL,"
+        "  addr_key TEXT NOT NULL,"
+        "  own_name TEXT NOT NULL,"
+        "  parcel_id TEXT NOT NULL"
+        ")"
+    )
+    conn.execute("CREATE UNIQUE INDEX idx_owners_county_addr_key ON owners (county, addr_key)")
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute(
+        "CREATE TABLE sales ("
+        "  county TEXT NOT NULL,"
+        "  parcel_id TEXT NOT NULL,"
+        "  sale_date TEXT NOT NULL,"
+        "  sale_price INTEGER,"
+        "  PRIMARY KEY (county, parcel_id)"
+        ")"
+    )
+
+
+def _fill(conn, rows, nal_year=None):
+    roll_id = roll_fingerprint(rows, nal_year)
+    conn.executemany(
+        "INSERT INTO owners (county, addr_key, own_name, parcel_id) VALUES (?, ?, ?, ?)",
+        zip(
+            rows.index.get_level_values('county'),
+            rows.index.get_level_values('addr_key'),
+            rows['own_name'].to_numpy(),
+            rows['parcel_id'].to_numpy(),
+        ),
+    )
+    conn.execute("INSERT INTO meta (key, value) VALUES ('roll_id', ?)", (roll_id,))
+    return roll_id
+
+
+def _fill_sales(conn, sales):
+    prices = pd.to_numeric(sales['SALE_PRC'], errors='coerce').astype('Int64')
+    conn.executemany(
+        "INSERT OR REPLACE INTO sales (county, parcel_id, sale_date, sale_price) VALUES (?, ?, ?, ?)",
+        zip(
+            normalize_county_series(sales['COUNTY']),
+            sales['PARCEL_ID'].astype(str),
+            sales['SALE_DATE'].astype(str),
+            [None if pd.isna(p) else int(p) for p in prices],
+        ),
+    )
+
+
+def write_owner_index(df, path, nal_year=None, sales=None):
+    """Build the SQLite owner index from a lookup DataFrame, replacing path atomically.
+
+    sales, if given, holds each parcel's latest sale (COUNTY, PARCEL_ID,
+    SALE_DATE, SALE_PRC) and fills the sales table.
+
+    Returns (number of indexed addresses, roll_id).
+    """
+    rows = owner_rows(df)
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            _create_schema(conn)
+            roll_id = _fill(conn, rows, nal_year)
+            if sales is not None:
+                _fill_sales(conn, sales)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    return len(rows), roll_id
+
+
+def open_owner_index(path):
+    """Open a prebuilt owner index read-only."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    return OwnerIndex(conn)
+
+
+def build_memory_index(df):
+    """Build an in-memory owner index from a lookup DataFrame."""
+    conn = sqlite3.connect(':memory:')
+    with conn:
+        _create_schema(conn)
+        _fill(conn, owner_rows(df))
+    return OwnerIndex(conn)
+
+
+class OwnerIndex:
+    """Read access to an owner index: exact and first-prefix address lookups.
+
+    Every lookup takes the listing's county. Known counties are searched on
+    their own partition only; an unknown or blank county searches them all,
+    and the first-inserted match across counties wins.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._size = conn.execute("SELECT COUNT(*) FROM owners").fetchone()[0]
+        self.roll_id = conn.execute(
+            "SELECT value FROM meta WHERE key = 'roll_id'"
+        ).fetchone()[0]
+        self.counties = [
+            row[0] for row in conn.execute("SELECT DISTINCT county FROM owners ORDER BY county")
+        ]
+
+    def __len__(self):
+        return self._size
+
+    def _partitions(self, county):
+        return [county] if county in self.counties else self.counties
+
+    def get_many(self, lookups):
+        """Return {(county, addr_key): (owner name, parcel id)} for the exact matches.
+
+        The (county, addr_key) pairs go into a temp table that is joined against
+        the owner index in one statement, instead of one query per key.
+        """
+        with self.conn:
+            self.conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS lookup_keys ("
+                "  req_county TEXT, county TEXT, addr_key TEXT,"
+                "  PRIMARY KEY (req_county, county, addr_key))"
+            )
+            self.conn.execute("DELETE FROM lookup_keys")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO lookup_keys (req_county, county, addr_key) VALUES (?, ?, ?)",
+                (
+                    (county, partition, key)
+                    for county, key in lookups
+                    for partition in self._partitions(county)
+                ),
+            )
+        # SQLite fills bare columns from the MIN(rowid) row of each group.
+        rows = self.conn.execute(
+            "SELECT k.req_county, k.addr_key, o.own_name, o.parcel_id, MIN(o.rowid)"
+            " FROM lookup_keys k"
+            " JOIN owners o ON o.county = k.county AND o.addr_key = k.addr_key"
+            " GROUP BY k.req_county, k.addr_key"
+        ).fetchall()
+        return {(county, key): (name, parcel_id) for county, key, name, parcel_id, _ in rows}
+
+    def latest_sales(self, parcels):
+        """Return {(county, parcel_id): (sale date 'YYYY-MM', sale price)} for parcels with a sale."""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS lookup_parcels ("
+                "  county TEXT, parcel_id TEXT, PRIMARY KEY (county, parcel_id))"
+            )
+            self.conn.execute("DELETE FROM lookup_parcels")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO lookup_parcels (county, parcel_id) VALUES (?, ?)", parcels
+            )
+        rows = self.conn.execute(
+            "SELECT s.county, s.parcel_id, s.sale_date, s.sale_price FROM lookup_parcels p"
+            " JOIN sales s ON s.county = p.county AND s.parcel_id = p.parcel_id"
+        ).fetchall()
+        return {(county, parcel_id): (date, price) for county, parcel_id, date, price in rows}
+
+    def first_with_prefix(self, prefix, county=''):
+        """Return (owner name, parcel id) of the first-inserted key starting with prefix, or None."""
+        best = None
+        for partition in self._partitions(county):
+            row = self.conn.execute(
+                "SELECT rowid, own_name, parcel_id FROM owners WHERE rowid = ("
+                "  SELECT MIN(rowid) FROM owners"
+                "  WHERE county = ? AND addr_key >= ? AND addr_key < ?"
+                ")",
+                (partition, prefix, prefix + _PREFIX_END),
+            ).fetchone()
+            if row and (best is None or row[0] < best[0]):
+                best = row
+        return tuple(best[1:]) if best else None
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,321 @@
+"""
+snapshot_store.py
+─────────────────────────────────────────────────────────────────────────────
+Daily VLS snapshots and their manifest, shared by both scripts.
+
+data/snapshot_manifest.csv holds one row per snapshot (date, file name, row
+count, sha256, kind), sorted by date. main.py writes each snapshot through
+SnapshotManifest.write(), which records it and replaces the manifest
+atomically. Lookups bisect the sorted dates instead of listing and
+regex-matching everything in data/.
+
+A snapshot is either a full file (VLS_YYYY-MM-DD.csv) or, in delta mode, a
+VLS_YYYY-MM-DD.delta.csv holding every listing's ULIKey in order and full
+rows only for listings added or changed since the previous snapshot. A full
+keyframe is written at least every KEYFRAME_DAYS days. Either kind may be
+gzipped (.csv.gz). read() materializes any date exactly, whichever way it
+was stored.
+
+When the manifest does not exist yet it is bootstrapped once from a
+directory scan.
+─────────────────────────────────────────────────────────────────────────────
+"""
+
+import io
+import os
+import re
+import shutil
+import bisect
+import hashlib
+
+import pandas as pd
+
+# ─────────────────────────────────────────────
+# Snapshot schema
+# ─────────────────────────────────────────────
+LISTING_COLUMNS = [
+    "ULIKey", "Address", "Village", "County", "Model", "Price",
+    "Bedrooms", "Baths", "SquareFeet", "Garage", "Pool",
+    "Latitude", "Longitude", "Status", "SaleType",
+    "YouTubeVideoId", "VLSNumber",
+]
+
+# Baths stays categorical: the API sends values like "2.5+".
+INTEGER_COLUMNS = ["Price", "Bedrooms", "SquareFeet"]
+FLOAT_COLUMNS = ["Latitude", "Longitude"]
+CATEGORICAL_COLUMNS = ["Village", "County", "Model", "Baths", "Garage", "Status", "SaleType"]
+TEXT_COLUMNS = [
+    col for col in LISTING_COLUMNS
+    if col not in INTEGER_COLUMNS + FLOAT_COLUMNS + CATEGORICAL_COLUMNS
+]
+
+SNAPSHOT_PATTERN = re.compile(r"^VLS_(\d{4}-\d{2}-\d{2})(\.delta)?\.csv(\.gz)?$")
+MANIFEST_NAME = 'snapshot_manifest.csv'
+MANIFEST_COLUMNS = ['Date', 'File', 'Rows', 'Sha256', 'Kind']
+
+# Delta files: '=' rows carry only the ULIKey (same as the previous snapshot),
+# '+' rows are new listings and '~' rows changed ones. Removed listings are absent.
+DELTA_OP = '_op'
+KEYFRAME_DAYS = 7
+READ_CHUNK_ROWS = 50_000
+
+
+def apply_listing_types(df):
+    """Cast the snapshot columns present in df to their schema dtypes (numeric, categorical, text)."""
+    df = df.copy()
+    for col in INTEGER_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int64')
+    for col in FLOAT_COLUMNS:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype('float64')
+    for col in CATEGORICAL_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('string').astype('category')
+    for col in TEXT_COLUMNS:
+        if col in df:
+            df[col] = df[col].astype('string')
+    return df
+
+
+def write_csv(df, path):
+    """Write a data/ CSV (utf-8-sig), gzipped when path ends in .gz.
+
+    The gzip header's mtime is zeroed so identical content gives identical bytes.
+    """
+    compression = {'method': 'gzip', 'mtime': 0} if path.endswith('.gz') else None
+    df.to_csv(path, index=False, encoding='utf-8-sig', compression=compression)
+
+
+def _read_text(path, columns=None, ulikeys=None):
+    """Read a snapshot or delta file with every field kept as its exact CSV text.
+
+    columns projects the read; ulikeys keeps only those listings' rows, filtered
+    chunk by chunk so the other rows are never held as a whole.
+    """
+    if ulikeys is None:
+        return pd.read_csv(path, dtype=str, keep_default_na=False, usecols=columns)
+    chunks = pd.read_csv(
+        path, dtype=str, keep_default_na=False, usecols=columns, chunksize=READ_CHUNK_ROWS
+    )
+    return pd.concat([chunk[chunk['ULIKey'].isin(ulikeys)] for chunk in chunks], ignore_index=True)
+
+
+def _as_text(df):
+    """The exact CSV text of each field, as a full snapshot file would store it."""
+    return pd.read_csv(
+        io.StringIO(df[LISTING_COLUMNS].to_csv(index=False)), dtype=str, keep_default_na=False
+    )
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SnapshotManifest:
+    """Sorted snapshot entries for one data folder."""
+
+    def __init__(self, folder, entries):
+        self.folder = folder
+        self._last_read = None   # (date, text frame) of the last materialized snapshot
+        self._set_entries(entries)
+
+    def _set_entries(self, entries):
+        self.entries = entries.sort_values('Date', ignore_index=True)
+        self.dates = self.entries['Date'].tolist()
+
+    @property
+    def path(self):
+        return os.path.join(self.folder, MANIFEST_NAME)
+
+    def _file_path(self, i):
+        return os.path.join(self.folder, self.entries.at[i, 'File'])
+
+    def _is_delta(self, i):
+        return self.entries.at[i, 'Kind'] == 'delta'
+
+    def latest_before(self, date_str):
+        """Return (filepath, date_str) of the most recent snapshot before date_str, or (None, None)."""
+        i = bisect.bisect_left(self.dates, date_str) - 1
+        while i >= 0 and not os.path.exists(self._file_path(i)):
+            i -= 1
+        if i < 0:
+            return None, None
+        return self._file_path(i), self.dates[i]
+
+    def between(self, start=None, end=None):
+        """Return [(filepath, date_str)] of snapshots with start <= date <= end, oldest first."""
+        lo = bisect.bisect_left(self.dates, start) if start else 0
+        hi = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return [(self._file_path(i), self.dates[i]) for i in range(lo, hi)]
+
+    # ── Reading ───────────────────────────────────────────────────────────
+    def _materialize(self, i):
+        """Text frame of entry i, replaying deltas forward from the nearest keyframe."""
+        if self._last_read and self._last_read[0] == self.dates[i]:
+            return self._last_read[1]
+        if not self._is_delta(i):
+            frame = _read_text(self._file_path(i))
+        elif i == 0:
+            raise ValueError(f"❌ Delta snapshot {self.dates[i]} has no earlier keyframe")
+        else:
+            frame = _apply_delta(self._materialize(i - 1), _read_text(self._file_path(i)))
+        self._last_read = (self.dates[i], frame)
+        return frame
+
+    def read_text(self, date_str):
+        """Return the snapshot for date_str with every field as its exact CSV text."""
+        return self._materialize(self.dates.index(date_str)).copy()
+
+    def read(self, date_str, columns=None, ulikeys=None):
+        """Return the snapshot for date_str as a typed DataFrame, in file order.
+
+        Every field is read as text and cast by the snapshot schema; nothing is
+        inferred. columns projects the read (ULIKey is always included) and
+        ulikeys keeps only those listings' rows. Full files are read directly;
+        delta snapshots are materialized first, then projected.
+        """
+        columns = LISTING_COLUMNS if columns is None else ['ULIKey'] + [c for c in columns if c != 'ULIKey']
+        i = self.dates.index(date_str)
+        cached = self._last_read and self._last_read[0] == date_str
+        if self._is_delta(i) or cached:
+            text = self._materialize(i)[columns]
+            if ulikeys is not None:
+                text = text[text['ULIKey'].isin(ulikeys)].reset_index(drop=True)
+        else:
+            text = _read_text(self._file_path(i), columns, ulikeys)
+        return apply_listing_types(text.replace('', pd.NA))[columns]
+
+    # ── Writing ───────────────────────────────────────────────────────────
+    def write(self, date_str, df, delta=False, compress=False, same_as_previous=False):
+        """Save df as the snapshot for date_str, record it, and return the file path.
+
+        With delta=True a delta against the previous snapshot is written unless
+        the last keyframe is KEYFRAME_DAYS or more days old; compress=True gzips
+        the file. same_as_previous says df is known to equal the previous
+        snapshot; a full previous file in the same format is then copied instead
+        of re-serialized.
+        """
+        suffix = '.csv.gz' if compress else '.csv'
+        previous_path, previous_date = self.latest_before(date_str)
+        previous = self.dates.index(previous_date) if previous_date else None
+
+        # Entries after this date may be deltas built on its current content:
+        # turn the next one into a keyframe before that content changes.
+        later = bisect.bisect_right(self.dates, date_str)
+        if date_str in self.dates and later < len(self.dates) and self._is_delta(later):
+            next_text = self._materialize(later)
+            next_suffix = '.csv.gz' if self._file_path(later).endswith('.gz') else '.csv'
+            self._write_full(self.dates[later], next_text, len(next_text), next_suffix)
+
+        if delta and previous is not None and not self._keyframe_due(previous, date_str):
+            text = _as_text(df)
+            previous_text = self._materialize(previous)
+            if text['ULIKey'].is_unique and previous_text['ULIKey'].is_unique:
+                return self._write_delta(date_str, _make_delta(previous_text, text), len(df), suffix)
+
+        path = os.path.join(self.folder, f'VLS_{date_str}{suffix}')
+        if (same_as_previous and previous is not None and not self._is_delta(previous)
+                and previous_path.endswith(suffix)):
+            shutil.copyfile(previous_path, path)
+            self._record(date_str, path, len(df), 'full')
+            return path
+        return self._write_full(date_str, df, len(df), suffix)
+
+    def _keyframe_due(self, previous, date_str):
+        i = previous
+        while i > 0 and self._is_delta(i):
+            i -= 1
+        keyframe_date = pd.Timestamp(self.dates[i])
+        return (pd.Timestamp(date_str) - keyframe_date).days >= KEYFRAME_DAYS
+
+    def _write_full(self, date_str, df, rows, suffix):
+        path = os.path.join(self.folder, f'VLS_{date_str}{suffix}')
+        write_csv(df[LISTING_COLUMNS], path)
+        self._record(date_str, path, rows, 'full')
+        return path
+
+    def _write_delta(self, date_str, delta, rows, suffix):
+        path = os.path.join(self.folder, f'VLS_{date_str}.delta{suffix}')
+        write_csv(delta, path)
+        self._record(date_str, path, rows, 'delta')
+        return path
+
+    def _record(self, date_str, path, rows, kind):
+        """Add or replace the entry for date_str, remove a superseded file, and save the manifest."""
+        if date_str in self.dates:
+            old_path = self._file_path(self.dates.index(date_str))
+            if old_path != path and os.path.exists(old_path):
+                os.remove(old_path)
+        if self._last_read and self._last_read[0] == date_str:
+            self._last_read = None
+        entry = pd.DataFrame(
+            [[date_str, os.path.basename(path), rows, file_sha256(path), kind]], columns=MANIFEST_COLUMNS
+        )
+        kept = self.entries[self.entries['Date'] != date_str]
+        self._set_entries(pd.concat([kept, entry], ignore_index=True) if not kept.empty else entry)
+        self.save()
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        self.entries.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+        os.replace(tmp_path, self.path)
+
+
+def _make_delta(previous, current):
+    """Delta rows turning the previous snapshot's text frame into the current one."""
+    previous_rows = previous.set_index('ULIKey')[LISTING_COLUMNS[1:]]
+    current_rows = current.set_index('ULIKey')[LISTING_COLUMNS[1:]]
+    known = current_rows.index.isin(previous_rows.index)
+    same = pd.Series(False, index=current_rows.index)
+    same[known] = (
+        current_rows[known] == previous_rows.loc[current_rows.index[known]]
+    ).all(axis=1).to_numpy()
+
+    delta = current.copy()
+    delta.insert(0, DELTA_OP, '~')
+    delta.loc[~known, DELTA_OP] = '+'
+    delta.loc[same.to_numpy(), DELTA_OP] = '='
+    delta.loc[same.to_numpy(), LISTING_COLUMNS[1:]] = ''
+    return delta
+
+
+def _apply_delta(previous, delta):
+    """Rebuild a snapshot's text frame from the previous one and its delta."""
+    current = delta[LISTING_COLUMNS].copy()
+    same = (delta[DELTA_OP] == '=').to_numpy()
+    previous_rows = previous.set_index('ULIKey')[LISTING_COLUMNS[1:]]
+    current.loc[same, LISTING_COLUMNS[1:]] = previous_rows.loc[current.loc[same, 'ULIKey']].to_numpy()
+    return current
+
+
+def _scan_snapshots(folder):
+    rows = []
+    for name in sorted(os.listdir(folder)):
+        match = SNAPSHOT_PATTERN.match(name)
+        if not match:
+            continue
+        path = os.path.join(folder, name)
+        row_count = len(pd.read_csv(path, usecols=[0], dtype=str))
+        kind = 'delta' if match.group(2) else 'full'
+        rows.append([match.group(1), name, row_count, file_sha256(path), kind])
+    return pd.DataFrame(rows, columns=MANIFEST_COLUMNS)
+
+
+def load_snapshot_manifest(folder):
+    """Load the folder's snapshot manifest, building it from a directory scan the first time."""
+    path = os.path.join(folder, MANIFEST_NAME)
+    if os.path.exists(path):
+        entries = pd.read_csv(path, dtype={'Date': str, 'File': str, 'Sha256': str, 'Kind': str})
+        if 'Kind' not in entries:
+            entries['Kind'] = 'full'
+        return SnapshotManifest(folder, entries)
+
+    manifest = SnapshotManifest(folder, _scan_snapshots(folder))
+    manifest.save()
+    print(f"[🗂️] Snapshot manifest built: {len(manifest.dates)} snapshot(s)")
+    return manifest
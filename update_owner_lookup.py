@@ -3,7 +3,27 @@ update_owner_lookup.py
 ─────────────────────────────────────────────────────────────────────────────
 Weekly script that downloads the Florida Department of Revenue NAL (Name-
 Address-Legal) property roll files for Sumter, Lake, and Marion counties,
-then builds a single lookup CSV: data/owner_lookup.csv
+then builds a single lookup table: data/owner_lookup.parquet (typed,
+zstd-compressed, with low-cardinality columns dictionary-encoded)
+
+It also writes data/owner_index.sqlite, a prebuilt index of normalized
+address → owner name that main.py opens directly instead of re-parsing
+and re-normalizing the table every day.
+
+Each rebuild is diffed against the previous roll; changed parcels (new
+owners, new mailing addresses, added/removed parcels) are written to
+data/owner_changes_YYYY-MM-DD.csv so ownership changes can be followed and
+main.py can refresh only the affected cached matches.
+
+The county SDF (sales data file) rolls are streamed alongside, filtered to
+the parcels in the lookup, and reduced to each parcel's latest sale; they
+are stored in the index so main.py can confirm removed listings as sold.
+
+Downloaded zips are cached in .nal_cache/ and revalidated with conditional
+requests; when no county's roll has changed and every new VLS listing
+address already has a parcel in the index, nothing is re-parsed and the
+outputs are left untouched. Downloads go through http_client.py, which
+retries transient failures with backoff.
 
 This file is then used by main.py to automatically add owner names to any
 removed/sold listings — no manual county website lookups needed.
@@ -13,16 +33,35 @@ Run schedule: Once per week (Sunday) via GitHub Actions.
 """
 
 import os
-import io
+import json
 import zipfile
 import requests
+import numpy as np
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+
+from http_client import download, print_run_metrics
+from owner_index import (
+    listing_address_keys, normalize_address_series, open_owner_index, read_lookup_batches,
+    write_lookup_table, write_owner_index,
+)
+from history_store import load_history
 
 # ── Paths ──────────────────────────────────────────────────────────────────
 folder_path = os.path.join(os.path.dirname(__file__), 'data')
 os.makedirs(folder_path, exist_ok=True)
-LOOKUP_FILE = os.path.join(folder_path, 'owner_lookup.csv')
+LOOKUP_FILE = os.path.join(folder_path, 'owner_lookup.parquet')
+LEGACY_LOOKUP_FILE = os.path.join(folder_path, 'owner_lookup.csv')
+INDEX_FILE = os.path.join(folder_path, 'owner_index.sqlite')
+VILLAGES_ZIPS_FILE = os.path.join(folder_path, 'villages_zips.csv')
+VILLAGES_KEYS_FILE = os.path.join(folder_path, 'villages_listing_keys.csv')
+
+# Downloaded NAL zips plus their ETag/Last-Modified/sha256, kept out of git
+# (restored between workflow runs by actions/cache).
+NAL_CACHE_DIR = os.path.join(os.path.dirname(__file__), '.nal_cache')
+NAL_CACHE_MANIFEST = os.path.join(NAL_CACHE_DIR, 'manifest.json')
 
 # ── Florida DOR NAL file URL pattern ──────────────────────────────────────
 # Files are named: "{County} {##} Final NAL {YEAR}.zip"
@@ -49,6 +88,13 @@ BASE_URL = (
     "{county_name}%20{county_code}%20Final%20NAL%20{year}.zip"
 )
 
+# Sales Data Files (SDF) sit alongside the NAL files with the same naming
+SDF_BASE_URL = (
+    "https://floridarevenue.com/property/dataportal/Documents/"
+    "PTO%20Data%20Portal/Tax%20Roll%20Data%20Files/SDF/{year}F/"
+    "{county_name}%20{county_code}%20Final%20SDF%20{year}.zip"
+)
+
 COUNTIES = [
     {"name": "Lake",   "code": "35"},
     {"name": "Marion", "code": "42"},
@@ -75,70 +121,328 @@ KEEP_COLS = [
     'PHY_ADDR1', 'PHY_ADDR2', 'PHY_CITY', 'PHY_ZIPCD',
 ]
 
-
-def download_and_parse_nal(county_name, county_code, year):
-    """Download a county NAL zip, extract the CSV, return a DataFrame."""
-    url = BASE_URL.format(
+# SDF fields: sale year/month and price per sale record of a parcel
+SDF_COLS = ['PARCEL_ID', 'SALE_YR', 'SALE_MO', 'SALE_PRC']
+
+
+# Fields that define a parcel's ownership record for the weekly roll diff
+ROLL_HASH_COLS = ['PARCEL_ID', 'OWN_NAME', 'OWN_ADDR1', 'OWN_ADDR2', 'OWN_ADDR3']
+DELTA_COLS = ['CHANGE', 'COUNTY', 'PARCEL_ID', 'FULL_PHY_ADDR', 'OLD_OWN_NAME', 'OWN_NAME']
+
+
+NAL_CHUNK_ROWS = 100_000
+
+
+def load_cache_manifest():
+    """Return {url: {etag, last_modified, sha256}} for zips in the NAL cache."""
+    if not os.path.exists(NAL_CACHE_MANIFEST):
+        return {}
+    with open(NAL_CACHE_MANIFEST, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_cache_manifest(manifest, fetched=(), results=None):
+    """Record the fetched zips' new manifest entries and write the manifest.
+
+    results, aligned with fetched, holds each zip's parse result; zips whose
+    parse failed (None) stay unrecorded, so the next run downloads and parses
+    them again instead of seeing them as unchanged.
+    """
+    results = [True] * len(fetched) if results is None else results
+    for (_, _, _, record), result in zip(fetched, results):
+        if record is not None and result is not None:
+            url, entry = record
+            manifest[url] = entry
+    tmp_path = NAL_CACHE_MANIFEST + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, NAL_CACHE_MANIFEST)
+
+
+def fetch_zip(url, manifest):
+    """Fetch a zip into the NAL cache, revalidating any cached copy.
+
+    Sends If-None-Match / If-Modified-Since when the zip is already cached and
+    streams a fresh copy to disk in chunks otherwise (restarted if the
+    connection drops mid-download). Returns (path, changed,
+    record); changed is False on a 304 or when the new download hashes the
+    same. record is the (url, manifest entry) for a fresh download, or None on
+    a 304. It is not added to the manifest here: main() records it only once
+    the zip has been parsed into the outputs, so a failed parse is retried.
+    """
+    path = os.path.join(NAL_CACHE_DIR, os.path.basename(unquote(urlparse(url).path)))
+    entry = manifest.get(url)
+    headers = {}
+    if entry and os.path.exists(path):
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    part_path = path + '.part'
+    resp, sha256 = download(url, part_path, timeout=120, headers=headers)
+    if resp.status_code == 304:
+        return path, False, None
+    resp.raise_for_status()
+    os.replace(part_path, path)
+
+    changed = entry is None or entry.get('sha256') != sha256
+    record = (url, {
+        'etag': resp.headers.get('ETag'),
+        'last_modified': resp.headers.get('Last-Modified'),
+        'sha256': sha256,
+    })
+    return path, changed, record
+
+
+def fetch_nal(county_name, county_code, year, manifest, base_url=None, kind='NAL'):
+    """Fetch a county NAL (or, with base_url/kind, SDF) zip into the cache,
+    falling back to the prior year.
+
+    Returns (zip_path, changed, record) as fetch_zip does.
+    """
+    base_url = base_url or BASE_URL
+    url = base_url.format(
         year=year,
         county_name=county_name,
         county_code=county_code
     )
-    print(f"  [⬇️] Downloading {county_name} County NAL {year}...")
+    print(f"  [⬇️] Checking {county_name} County {kind} {year}...")
     print(f"       URL: {url}")
 
     try:
-        resp = requests.get(url, timeout=120)
-        resp.raise_for_status()
+        zip_path, changed, record = fetch_zip(url, manifest)
     except requests.exceptions.HTTPError as e:
         print(f"  [⚠️] HTTP error for {county_name}: {e}")
         print(f"       The {year} final roll may not be posted yet. Trying {year - 1}...")
-        fallback_url = BASE_URL.format(
+        fallback_url = base_url.format(
             year=year - 1,
             county_name=county_name,
             county_code=county_code
         )
-        resp = requests.get(fallback_url, timeout=120)
-        resp.raise_for_status()
+        zip_path, changed, record = fetch_zip(fallback_url, manifest)
         print(f"  [✅] Fallback to {year - 1} succeeded.")
 
-    # The zip contains one CSV file
-    with zipfile.ZipFile(io.BytesIO(resp.content)) as z:
+    if changed:
+        print(f"  [🆕] {county_name} {kind}: downloaded new file ({os.path.getsize(zip_path) / 1_000_000:.1f} MB)")
+    else:
+        print(f"  [✅] {county_name} {kind}: cached file is current")
+    return zip_path, changed, record
+
+
+def nal_csv_name(z, county_name):
+    """Name of the one CSV inside a county NAL zip."""
+    csv_files = [f for f in z.namelist() if f.lower().endswith('.csv')]
+    if not csv_files:
+        raise ValueError(f"No CSV found in ZIP for {county_name}")
+    return csv_files[0]
+
+
+def parse_nal_zip(zip_path, county_name, villages=None):
+    """Extract the CSV from a cached county NAL zip and return a DataFrame."""
+    with zipfile.ZipFile(zip_path) as z:
+        csv_name = nal_csv_name(z, county_name)
+        print(f"  [📄] Parsing {csv_name}...")
+        with z.open(csv_name) as f:
+            header = pd.read_csv(f, nrows=0, encoding='latin-1').columns
+        with z.open(csv_name) as f:
+            df = parse_nal_csv(f, header, county_name, villages)
+
+    print(f"  [✅] {county_name}: {len(df):,} parcels with an owner name kept")
+    return df
+
+
+def load_villages_filter():
+    """Build the Villages pre-filter from historical VLS snapshots.
+
+    Returns {'addr_keys': set, 'zips': set}: every listing address ever seen in
+    a daily snapshot, plus the ZIP codes those addresses were found in on
+    previous builds. Returns None (no filtering) when there is no history yet.
+    """
+    history = load_history(folder_path, columns=['Address'])
+    if history.empty:
+        return None
+
+    addr_keys = set(listing_address_keys(history['Address'].drop_duplicates()))
+    addr_keys.discard('')
+
+    zips = set()
+    if os.path.exists(VILLAGES_ZIPS_FILE):
+        zips = set(pd.read_csv(VILLAGES_ZIPS_FILE, dtype=str)['PHY_ZIPCD'].dropna())
+
+    print(f"[🏘️] Villages filter: {len(addr_keys):,} listing addresses, {len(zips)} known ZIP codes")
+    return {'addr_keys': addr_keys, 'zips': zips}
+
+
+def save_villages_zips(villages):
+    """Save the learned ZIP codes and the listing addresses this build filtered with."""
+    pd.DataFrame({'PHY_ZIPCD': sorted(villages['zips'])}).to_csv(
+        VILLAGES_ZIPS_FILE, index=False, encoding='utf-8-sig'
+    )
+    pd.DataFrame({'ADDR_KEY': sorted(villages['addr_keys'])}).to_csv(
+        VILLAGES_KEYS_FILE, index=False, encoding='utf-8-sig'
+    )
+
+
+def unmatched_new_listings(villages):
+    """Count listing addresses new since the last build that the owner index has no parcel for.
+
+    Such a listing may sit in a ZIP code the last build never learned (a new
+    Villages phase), so its parcels were filtered out; the lookup has to be
+    rebuilt even if no roll file changed. Without a record of the last build's
+    addresses, every address counts as new.
+    """
+    if villages is None:
+        return 0
+    previous = set()
+    if os.path.exists(VILLAGES_KEYS_FILE):
+        previous = set(pd.read_csv(VILLAGES_KEYS_FILE, dtype=str, keep_default_na=False)['ADDR_KEY'])
+    new_keys = villages['addr_keys'] - previous
+    if not new_keys:
+        return 0
+
+    index = open_owner_index(INDEX_FILE)
+    try:
+        matched = index.get_many({('', key) for key in new_keys})
+    finally:
+        index.close()
+    return len(new_keys) - len(matched)
+
+
+def parse_sdf_zip(zip_path, county_name, parcel_ids):
+    """Stream a county SDF (sales data file), keeping each lookup parcel's latest sale.
+
+    Only rows whose PARCEL_ID is in parcel_ids (the Villages-filtered lookup)
+    survive each chunk. Returns COUNTY, PARCEL_ID, SALE_DATE (YYYY-MM), SALE_PRC.
+    """
+    with zipfile.ZipFile(zip_path) as z:
         csv_files = [f for f in z.namelist() if f.lower().endswith('.csv')]
         if not csv_files:
-            raise ValueError(f"No CSV found in ZIP for {county_name}")
-        csv_name = csv_files[0]
-        print(f"  [📄] Parsing {csv_name} ({len(resp.content) / 1_000_000:.1f} MB download)...")
-        with z.open(csv_name) as f:
-            # NAL files are large — read only the columns we need
-            df = pd.read_csv(
+            raise ValueError(f"No CSV found in SDF ZIP for {county_name}")
+        print(f"  [📄] Parsing {csv_files[0]}...")
+        with z.open(csv_files[0]) as f:
+            reader = pd.read_csv(
                 f,
-                dtype=str,          # keep everything as string (parcel IDs have leading zeros)
-                low_memory=False,
-                encoding='latin-1', # DOR files sometimes use latin-1
-                on_bad_lines='skip'
+                usecols=SDF_COLS,
+                dtype=str,
+                encoding='latin-1',
+                on_bad_lines='skip',
+                chunksize=NAL_CHUNK_ROWS,
             )
+            chunks = [latest_sales(chunk[chunk['PARCEL_ID'].isin(parcel_ids)]) for chunk in reader]
+
+    sales = latest_sales(pd.concat(chunks, ignore_index=True)) if chunks else latest_sales(None)
+    sales.insert(0, 'COUNTY', county_name)
+    print(f"  [✅] {county_name}: latest sale found for {len(sales):,} parcels")
+    return sales
+
+
+def latest_sales(sales):
+    """Reduce sale rows to the most recent sale per PARCEL_ID."""
+    columns = ['PARCEL_ID', 'SALE_DATE', 'SALE_PRC']
+    if sales is None or sales.empty:
+        return pd.DataFrame(columns=columns)
+    if 'SALE_DATE' not in sales:
+        year = pd.to_numeric(sales['SALE_YR'], errors='coerce')
+        month = pd.to_numeric(sales['SALE_MO'], errors='coerce')
+        sales = sales.assign(
+            SALE_DATE=year.astype('Int64').astype(str) + '-' + month.astype('Int64').astype(str).str.zfill(2),
+            SALE_PRC=pd.to_numeric(sales['SALE_PRC'], errors='coerce'),
+        )[year.notna() & month.notna()]
+    return (
+        sales[columns]
+        .sort_values(['SALE_DATE', 'SALE_PRC'])
+        .drop_duplicates('PARCEL_ID', keep='last')
+        .reset_index(drop=True)
+    )
+
 
-    print(f"  [✅] {county_name}: {len(df):,} parcels loaded, {len(df.columns)} columns")
+def full_phy_addr(chunk):
+    """Clean physical address string for matching against VLS addresses."""
+    return (
+        chunk['PHY_ADDR1'].str.strip() + ' ' + chunk['PHY_ADDR2'].str.strip()
+    ).str.strip().str.upper()
+
+
+def scan_villages_zips(zip_path, county_name, addr_keys):
+    """Return the ZIP codes of every parcel in a county NAL zip whose address matches a VLS listing.
 
-    # Keep only columns that exist in this file
-    available = [c for c in KEEP_COLS if c in df.columns]
-    missing = [c for c in KEEP_COLS if c not in df.columns]
+    This is a first pass over the whole file reading only the physical-address
+    columns, so every ZIP is known before parse_nal_csv filters any row by it.
+    """
+    with zipfile.ZipFile(zip_path) as z:
+        csv_name = nal_csv_name(z, county_name)
+        with z.open(csv_name) as f:
+            header = pd.read_csv(f, nrows=0, encoding='latin-1').columns
+        if 'PHY_ZIPCD' not in header:
+            return set()
+        available = [c for c in ('PHY_ADDR1', 'PHY_ADDR2', 'PHY_ZIPCD') if c in header]
+        zips = set()
+        with z.open(csv_name) as f:
+            reader = pd.read_csv(
+                f, usecols=available, dtype=str, encoding='latin-1', on_bad_lines='skip',
+                chunksize=NAL_CHUNK_ROWS,
+            )
+            for chunk in reader:
+                for col in ('PHY_ADDR1', 'PHY_ADDR2'):
+                    chunk[col] = chunk[col].fillna('') if col in chunk else ''
+                is_listing = normalize_address_series(full_phy_addr(chunk)).isin(addr_keys)
+                zips.update(chunk.loc[is_listing, 'PHY_ZIPCD'].dropna().str.strip().str[:5])
+    return zips
+
+
+def parse_nal_csv(f, header, county_name, villages=None):
+    """Parse an open NAL CSV in chunks, reading only KEEP_COLS.
+
+    Each chunk is filtered and normalized before it is kept, so only the
+    projected, owner-bearing (and, with a villages filter, Villages-area)
+    rows are ever held in memory together.
+    """
+    available = [c for c in KEEP_COLS if c in header]
+    missing = [c for c in KEEP_COLS if c not in header]
     if missing:
         print(f"  [⚠️] Columns not found in {county_name} NAL (will be blank): {missing}")
 
-    df = df[available].copy()
-    df['COUNTY'] = county_name
+    reader = pd.read_csv(
+        f,
+        usecols=available,      # NAL files have 100+ columns — read only the ones we need
+        dtype=str,              # keep everything as string (parcel IDs have leading zeros)
+        encoding='latin-1',     # DOR files sometimes use latin-1
+        on_bad_lines='skip',
+        chunksize=NAL_CHUNK_ROWS,
+    )
+    chunks = [normalize_nal_chunk(chunk, missing, county_name, villages) for chunk in reader]
+    if not chunks:
+        return pd.DataFrame(columns=KEEP_COLS + ['COUNTY', 'FULL_PHY_ADDR'])
+    return pd.concat(chunks, ignore_index=True)
 
-    # Build a clean physical address string for matching against VLS addresses
-    df['FULL_PHY_ADDR'] = (
-        df.get('PHY_ADDR1', '').fillna('').str.strip() + ' ' +
-        df.get('PHY_ADDR2', '').fillna('').str.strip()
-    ).str.strip().str.upper()
 
-    df['PHY_CITY'] = df.get('PHY_CITY', '').fillna('').str.strip().str.upper()
-    df['OWN_NAME'] = df.get('OWN_NAME', '').fillna('').str.strip()
+def normalize_nal_chunk(chunk, missing, county_name, villages=None):
+    """Blank-fill missing columns, build FULL_PHY_ADDR, and drop owner-less parcels.
 
-    return df
+    With a villages filter, also drop parcels outside the Villages ZIP codes
+    (learned from every county file by scan_villages_zips beforehand). A parcel
+    whose address matches a historical VLS listing is always kept.
+    """
+    for col in missing:
+        chunk[col] = ''
+    chunk = chunk[KEEP_COLS].fillna('')
+    chunk['COUNTY'] = county_name
+
+    chunk['FULL_PHY_ADDR'] = full_phy_addr(chunk)
+
+    chunk['PHY_CITY'] = chunk['PHY_CITY'].str.strip().str.upper()
+    chunk['PHY_ZIPCD'] = chunk['PHY_ZIPCD'].str.strip().str[:5]
+    chunk['OWN_NAME'] = chunk['OWN_NAME'].str.strip()
+
+    # Parcels with no owner name are never useful for lookup
+    chunk = chunk[chunk['OWN_NAME'].str.len() > 0]
+
+    if villages is not None:
+        is_listing = normalize_address_series(chunk['FULL_PHY_ADDR']).isin(villages['addr_keys'])
+        chunk = chunk[is_listing | chunk['PHY_ZIPCD'].isin(villages['zips'])]
+
+    return chunk
 
 
 def build_lookup(dfs):
@@ -157,26 +461,200 @@ def build_lookup(dfs):
     return combined
 
 
+def parcel_keys(df):
+    return (df['COUNTY'].astype(str) + '|' + df['PARCEL_ID'].astype(str)).to_numpy()
+
+
+def parcel_hashes(df):
+    """Hash each parcel's identity, owner name and mailing address."""
+    cols = df[ROLL_HASH_COLS].astype(object).fillna('').astype(str)
+    return pd.util.hash_pandas_object(cols, index=False).to_numpy()
+
+
+def diff_rolls(previous_path, lookup):
+    """Diff the previous owner roll against the new lookup table.
+
+    A streaming hash-join: the new roll (already in memory) is the build side,
+    and the previous roll is read back in batches and probed against it, so
+    the old roll never has to be loaded whole. Returns a DataFrame of
+    DELTA_COLS with CHANGE = added / removed / changed.
+    """
+    new = lookup.drop_duplicates(['COUNTY', 'PARCEL_ID'], keep='last').reset_index(drop=True)
+    new_index = pd.Index(parcel_keys(new))
+    new_hashes = parcel_hashes(new)
+    seen = np.zeros(len(new), dtype=bool)
+
+    columns = ['COUNTY', 'FULL_PHY_ADDR'] + ROLL_HASH_COLS
+    changes = []
+    for batch in read_lookup_batches(previous_path, columns):
+        batch = batch.astype(object).fillna('').astype(str)
+        pos = new_index.get_indexer(parcel_keys(batch))
+        found = pos >= 0
+        seen[pos[found]] = True
+
+        removed = batch[~found]
+        changed_mask = np.zeros(len(batch), dtype=bool)
+        changed_mask[found] = new_hashes[pos[found]] != parcel_hashes(batch[found])
+        changed = new.iloc[pos[changed_mask]].assign(
+            OLD_OWN_NAME=batch.loc[changed_mask, 'OWN_NAME'].to_numpy()
+        )
+        changes.append(removed.assign(CHANGE='removed', OLD_OWN_NAME=removed['OWN_NAME'], OWN_NAME=''))
+        changes.append(changed.assign(CHANGE='changed'))
+
+    changes.append(new[~seen].assign(CHANGE='added', OLD_OWN_NAME=''))
+    delta = pd.concat([c[DELTA_COLS] for c in changes], ignore_index=True)
+    delta = delta.drop_duplicates(['COUNTY', 'PARCEL_ID', 'CHANGE'], keep='last')
+
+    counts = delta['CHANGE'].value_counts()
+    owner_changes = ((delta['CHANGE'] == 'changed') & (delta['OLD_OWN_NAME'] != delta['OWN_NAME'])).sum()
+    print(f"[🔁] Roll diff: {counts.get('added', 0):,} added, {counts.get('removed', 0):,} removed, "
+          f"{counts.get('changed', 0):,} changed ({owner_changes:,} ownership changes)")
+    return delta
+
+
+def save_roll_delta(delta, previous_roll_id, roll_id):
+    """Write the delta as data/owner_changes_YYYY-MM-DD.csv, tagged with both roll ids.
+
+    The ids are equal when only fields outside the owner index (mailing
+    addresses) changed.
+    """
+    filename = f"owner_changes_{datetime.now().strftime('%Y-%m-%d')}.csv"
+    delta.assign(FROM_ROLL=previous_roll_id, TO_ROLL=roll_id).to_csv(
+        os.path.join(folder_path, filename), index=False, encoding='utf-8-sig'
+    )
+    print(f"[💾] Saved {filename} → {len(delta):,} changed parcels")
+
+
+def fetch_county(county, manifest):
+    """Fetch one county's NAL zip; return (county, zip_path, changed, record) or None if it fails."""
+    try:
+        return (county, *fetch_nal(county['name'], county['code'], NAL_YEAR, manifest))
+    except Exception as e:
+        print(f"  [❌] Failed to load {county['name']} County: {e}")
+        print(f"       Skipping this county — lookup will work for the others.")
+        return None
+
+
+def fetch_county_sales(county, manifest):
+    """Fetch one county's SDF zip; return (county, zip_path, changed, record) or None if it fails."""
+    try:
+        return (county, *fetch_nal(
+            county['name'], county['code'], NAL_YEAR, manifest, base_url=SDF_BASE_URL, kind='SDF'
+        ))
+    except Exception as e:
+        print(f"  [⚠️] No sales data for {county['name']} County: {e}")
+        return None
+
+
+def parse_county_sales(fetched, lookup):
+    """Parse one fetched county SDF against the lookup's parcels, or return None if it fails."""
+    county, zip_path, _, _ = fetched
+    parcel_ids = set(lookup.loc[lookup['COUNTY'] == county['name'], 'PARCEL_ID'])
+    try:
+        return parse_sdf_zip(zip_path, county['name'], parcel_ids)
+    except Exception as e:
+        print(f"  [⚠️] Failed to parse {county['name']} County sales: {e}")
+        return None
+
+
+def scan_county_zips(fetched, addr_keys):
+    """Villages ZIP codes found in one fetched county zip (empty if it cannot be read)."""
+    county, zip_path, _, _ = fetched
+    try:
+        return scan_villages_zips(zip_path, county['name'], addr_keys)
+    except Exception:
+        return set()    # parse_county reports the failure
+
+
+def parse_county(fetched, villages=None):
+    """Parse one fetched county zip, or return None if it fails."""
+    county, zip_path, _, _ = fetched
+    try:
+        return parse_nal_zip(zip_path, county['name'], villages)
+    except Exception as e:
+        print(f"  [❌] Failed to parse {county['name']} County: {e}")
+        print(f"       Skipping this county — lookup will work for the others.")
+        return None
+
+
 def main():
     print(f"[▶️] Owner lookup update started — targeting NAL year: {NAL_YEAR}")
     print(f"[📅] Run date: {datetime.now().strftime('%Y-%m-%d %H:%M')}\n")
 
-    dfs = []
-    for county in COUNTIES:
-        try:
-            df = download_and_parse_nal(county['name'], county['code'], NAL_YEAR)
-            dfs.append(df)
-        except Exception as e:
-            print(f"  [❌] Failed to load {county['name']} County: {e}")
-            print(f"       Skipping this county — lookup will work for the others.")
+    os.makedirs(NAL_CACHE_DIR, exist_ok=True)
+    manifest = load_cache_manifest()
+
+    # Counties download and parse concurrently; results keep COUNTIES order.
+    with ThreadPoolExecutor(max_workers=2 * len(COUNTIES)) as pool:
+        fetched_nal = pool.map(lambda c: fetch_county(c, manifest), COUNTIES)
+        fetched_sdf = pool.map(lambda c: fetch_county_sales(c, manifest), COUNTIES)
+        fetched = [f for f in fetched_nal if f]
+        sales_fetched = [f for f in fetched_sdf if f]
+
+    villages = load_villages_filter()
+    outputs_exist = os.path.exists(LOOKUP_FILE) and os.path.exists(INDEX_FILE)
+    if fetched and outputs_exist and not any(changed for _, _, changed, _ in fetched + sales_fetched):
+        unmatched = unmatched_new_listings(villages)
+        if not unmatched:
+            save_cache_manifest(manifest, fetched + sales_fetched)
+            print("\n[✅] No NAL/SDF file has changed since the last build — owner_lookup.parquet left untouched.")
+            print_run_metrics()
+            return
+        print(f"\n[🏘️] {unmatched:,} new listing address(es) have no parcel in the lookup — rebuilding "
+              f"to pick up any new Villages ZIP codes.")
+
+    with ThreadPoolExecutor(max_workers=len(COUNTIES)) as pool:
+        # Learn the ZIP codes from every county's whole file before filtering any of them.
+        if villages is not None:
+            for zips in pool.map(lambda f: scan_county_zips(f, villages['addr_keys']), fetched):
+                villages['zips'].update(zips)
+        results = list(pool.map(lambda f: parse_county(f, villages), fetched))
+    dfs = [df for df in results if df is not None]
 
     if not dfs:
         print("[❌] No county data loaded. Exiting without saving.")
         return
 
+    if villages is not None:
+        save_villages_zips(villages)
+        print(f"[🏘️] Villages ZIP codes: {', '.join(sorted(villages['zips'])) or 'none'}")
+
     lookup = build_lookup(dfs)
-    lookup.to_csv(LOOKUP_FILE, index=False, encoding='utf-8-sig')
-    print(f"[💾] Saved owner_lookup.csv → {len(lookup):,} parcels")
+
+    # Diff against the previous roll before it is overwritten
+    previous_path = next(
+        (path for path in (LOOKUP_FILE, LEGACY_LOOKUP_FILE) if os.path.exists(path)), None
+    )
+    previous_roll_id = None
+    if os.path.exists(INDEX_FILE):
+        previous_index = open_owner_index(INDEX_FILE)
+        try:
+            previous_roll_id = previous_index.roll_id
+        finally:
+            previous_index.close()
+    delta = diff_rolls(previous_path, lookup) if previous_path else None
+
+    write_lookup_table(lookup, LOOKUP_FILE)
+    print(f"[💾] Saved owner_lookup.parquet → {len(lookup):,} parcels")
+    if os.path.exists(LEGACY_LOOKUP_FILE):
+        os.remove(LEGACY_LOOKUP_FILE)
+        print("[🧹] Removed superseded owner_lookup.csv")
+
+    with ThreadPoolExecutor(max_workers=len(COUNTIES)) as pool:
+        sales_results = list(pool.map(lambda f: parse_county_sales(f, lookup), sales_fetched))
+    sales = [s for s in sales_results if s is not None]
+    sales = pd.concat(sales, ignore_index=True) if sales else None
+
+    indexed, roll_id = write_owner_index(lookup, INDEX_FILE, NAL_YEAR, sales)
+    print(f"[💾] Saved owner_index.sqlite → {indexed:,} addresses, "
+          f"{0 if sales is None else len(sales):,} parcel sales")
+
+    # roll_id only covers what the owner index stores; the delta also tracks
+    # mailing addresses, so it is written whenever anything changed.
+    if delta is not None and not delta.empty:
+        save_roll_delta(delta, previous_roll_id, roll_id)
+    save_cache_manifest(manifest, fetched + sales_fetched, results + sales_results)
+    print_run_metrics()
     print(f"[✅] Done. main.py will use this file for owner name lookups.")
 
 